@@ -0,0 +1,112 @@
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get(url):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            response.read()
+    except urllib.error.HTTPError as e:
+        e.read()
+    return (time.perf_counter() - start) * 1000
+
+
+def memory_kb(pid):
+    """
+    (RSS, PSS) in KiB. PSS splits shared pages between the processes
+    sharing them, so it shows what preload_app saves.
+    """
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key] = int(rest.split()[0])
+    return values.get("Rss", 0), values.get("Pss", 0)
+
+
+def child_pids(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+class Command(BaseCommand):
+    help = (
+        "Starts gunicorn with gunicorn.conf.py and measures boot time, first-request "
+        "(cold worker) vs warm latency and worker memory, with and without preload_app."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/", help="Path to request")
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--requests", type=int, default=50, help="Warm requests after the cold ones")
+        parser.add_argument("--preload", choices=["on", "off", "both"], default="both")
+
+    def handle(self, *args, **options):
+        modes = {"on": [True], "off": [False], "both": [True, False]}[options["preload"]]
+        report = [self.run(preload, options) for preload in modes]
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run(self, preload, options):
+        port = free_port()
+        url = f"http://127.0.0.1:{port}{options['path']}"
+        env = {
+            **os.environ,
+            "GUNICORN_BIND": f"127.0.0.1:{port}",
+            "GUNICORN_WORKERS": str(options["workers"]),
+            "GUNICORN_PRELOAD": "1" if preload else "0",
+        }
+        start = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", str(settings.BASE_DIR / "gunicorn.conf.py")],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            ready_ms = self.wait_until_ready(server, url, start)
+            # Every worker's first request is cold; sync workers take them in turn
+            cold = [get(url) for _ in range(options["workers"])]
+            warm = sorted(get(url) for _ in range(options["requests"]))
+            workers = [memory_kb(pid) for pid in child_pids(server.pid)]
+            master = memory_kb(server.pid)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+
+        return {
+            "preload": preload,
+            "ready_ms": round(ready_ms, 1),
+            "cold_ms": [round(ms, 1) for ms in cold],
+            "warm_p50_ms": round(statistics.median(warm), 1),
+            "warm_max_ms": round(warm[-1], 1),
+            "master_rss_kb": master[0],
+            "workers_rss_kb": sum(rss for rss, _ in workers),
+            "workers_pss_kb": sum(pss for _, pss in workers),
+        }
+
+    def wait_until_ready(self, server, url, start, timeout=60):
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise CommandError("gunicorn exited during startup.")
+            try:
+                get(url)
+                return (time.perf_counter() - start) * 1000
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.05)
+        raise CommandError("gunicorn did not become ready in time.")
@@ -0,0 +1,51 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures per-request DB connection overhead: runs a trivial query inside "
+        "simulated requests (request_started/finished signals) with per-request, "
+        "persistent and the configured connection settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+        parser.add_argument("--requests", type=int, default=200)
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        configured = connection.settings_dict["CONN_MAX_AGE"]
+        pooled = bool(connection.settings_dict.get("OPTIONS", {}).get("pool"))
+
+        modes = [("configured" + (" (pool)" if pooled else f" (CONN_MAX_AGE={configured})"), configured)]
+        if not pooled:
+            modes += [("per-request (CONN_MAX_AGE=0)", 0), ("persistent (CONN_MAX_AGE=600)", 600)]
+
+        try:
+            for label, max_age in modes:
+                connection.settings_dict["CONN_MAX_AGE"] = max_age
+                connection.close()
+                timings = self.run(connection, options["requests"])
+                self.stdout.write(
+                    f"{label:<34} median {statistics.median(timings):7.3f} ms"
+                    f"  p95 {sorted(timings)[int(len(timings) * 0.95)]:7.3f} ms"
+                )
+        finally:
+            connection.settings_dict["CONN_MAX_AGE"] = configured
+            connection.close()
+
+    def run(self, connection, count):
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            request_started.send(sender=self.__class__)
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            request_finished.send(sender=self.__class__)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
@@ -0,0 +1,79 @@
+import time
+import uuid
+import statistics
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from api.renderers import ORJSONRenderer, MessagePackRenderer
+
+
+def build_item_rows(count):
+    """
+    Builds rows shaped like an ItemSerializer page with nested media,
+    without touching the database.
+    """
+    owner = uuid.uuid4()
+    rows = []
+    for i in range(count):
+        rows.append({
+            "id": i,
+            "owner": owner,
+            "name": f"Item {i}",
+            "type": "link",
+            "date_of_origin": "2025-11-27",
+            "tags": ["src-reddit", f"subreddit-sub{i % 50}", f"tag-{i % 7}"],
+            "created_at": "2025-11-27T14:52:00.123456Z",
+            "link_id": i,
+            "file_group_id": None,
+            "link": {
+                "id": i,
+                "item": i,
+                "url": f"https://www.reddit.com/r/sub{i % 50}/comments/abc{i}",
+                "url_domain": "www.reddit.com",
+                "media_url": f"https://v.redd.it/{i}/DASH_1080.mp4",
+                "media_url_domain": "v.redd.it",
+                "media_urls": [
+                    {
+                        "id": i * 2 + n,
+                        "link": i,
+                        "url": f"https://v.redd.it/{i}/DASH_1080.mp4",
+                        "hd_url": f"https://v.redd.it/{i}/DASH_1080.mp4",
+                        "hd_url_domain": "v.redd.it",
+                        "sd_url": f"https://v.redd.it/{i}/DASH_480.mp4",
+                        "sd_url_domain": "v.redd.it",
+                        "media_type": "video",
+                        "order": n,
+                    }
+                    for n in range(2)
+                ],
+            },
+        })
+    return {"count": count, "next": None, "previous": None, "results": rows}
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the JSON/MessagePack renderers on item list payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        renderers = [
+            ("drf-json", JSONRenderer()),
+            ("orjson", ORJSONRenderer()),
+            ("msgpack", MessagePackRenderer()),
+        ]
+
+        for size in options["sizes"]:
+            data = build_item_rows(size)
+            self.stdout.write(f"{size} rows")
+            for name, renderer in renderers:
+                timings = []
+                for _ in range(options["repeat"]):
+                    start = time.perf_counter()
+                    body = renderer.render(data)
+                    timings.append(time.perf_counter() - start)
+                self.stdout.write(
+                    f"  {name:<10} median {statistics.median(timings) * 1000:8.2f} ms"
+                    f"  size {len(body) / 1024:9.1f} KiB"
+                )
@@ -0,0 +1,220 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+import uuid
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from utils.request_timing import start_request, end_request
+from utils.metrics import REQUEST_SECONDS, method_label, status_class, view_labels
+from utils.log_config import request_id_var
+from utils import db_routing
+
+logger = logging.getLogger("api.requests")
+
+
+class RequestIdMiddleware:
+    """
+    Tags the request with an id (the incoming X-Request-ID, e.g. from nginx,
+    or a new one) that every log line emitted while handling it carries.
+    The id is echoed back in the X-Request-ID response header, and kept on
+    request.request_id for log lines written after the middleware returns
+    (django.request's 4xx/5xx lines).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.headers.get("X-Request-ID", "")[:64] or uuid.uuid4().hex
+        request.request_id = request_id
+        token = request_id_var.set(request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id_var.reset(token)
+        response["X-Request-ID"] = request_id
+        return response
+
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets utils.db_routing.ReplicaRouter send the reads of safe-method
+    requests to a replica. A request that writes (or uses an unsafe method)
+    sets a short-lived cookie that pins the client's following requests to
+    the primary, so it reads its own writes despite replication lag.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+    PIN_COOKIE = "db_pin"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in self.SAFE_METHODS
+        pinned = request.COOKIES.get(self.PIN_COOKIE) == "1"
+        token = db_routing.begin_request(read_replica=safe and not pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            state = db_routing.end_request(token)
+
+        if settings.DATABASE_REPLICAS and (state.wrote or not safe):
+            response.set_cookie(
+                self.PIN_COOKIE, "1", max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite="Lax"
+            )
+        return response
+
+class RequestTimingMiddleware:
+    """
+    Times every request: SQL (count and duration, through
+    connection.execute_wrapper), serializer work and outbound calls recorded
+    with utils.request_timing.timed(). Adds a Server-Timing header and logs
+    one structured line per request; requests slower than SLOW_REQUEST_MS
+    also log their slowest SQL statements. The latency is also exported as a metric by view
+    and action.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings, token = start_request()
+
+        def execute_wrapper(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                elapsed = time.perf_counter() - start
+                timings.add("db", elapsed)
+                timings.add_query(sql, elapsed * 1000)
+
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all(initialized_only=False):
+                    stack.enter_context(connection.execute_wrapper(execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            end_request(token)
+
+        response["Server-Timing"] = timings.server_timing()
+        view, action = view_labels(request)
+        REQUEST_SECONDS.labels(view, action, method_label(request.method), status_class(response.status_code)).observe(
+            timings.elapsed_ms() / 1000
+        )
+        self.log(request, response, timings)
+        return response
+
+    def log(self, request, response, timings):
+        summary = timings.as_dict()
+        resolver_match = request.resolver_match
+        line = {
+            "method": request.method,
+            "path": request.path,
+            "view": resolver_match.view_name if resolver_match else None,
+            "status": response.status_code,
+            **summary,
+        }
+        logger.info(
+            " ".join(f"{key}={value}" for key, value in line.items()),
+            extra={"request_timing": line},
+        )
+
+        if summary["total_ms"] >= settings.SLOW_REQUEST_MS:
+            queries = timings.slowest_queries()
+            logger.warning(
+                "Slow request %s %s (%.1f ms, %d queries, slowest %d):\n%s",
+                request.method,
+                request.path,
+                summary["total_ms"],
+                summary.get("db_count", 0),
+                len(queries),
+                "\n".join(f"[{ms:.1f} ms] {sql}" for sql, ms in queries),
+                extra={"request_timing": line},
+            )
+
+
+class ProfilingMiddleware:
+    """
+    Staff-only profiling switch: with `?_profile=1` or an `X-Profile: 1`
+    header the request runs under cProfile and the pstats report replaces
+    the normal body. `_profile_sort` picks the pstats sort key (default
+    cumulative). With PROFILE_DUMP_DIR set the raw profile (.prof, for
+    snakeviz and friends) and the text report are also written there.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.requested(request) or not self.is_staff(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+
+        if response.streaming:
+            # Consume the stream inside the profiler, its work happens lazily
+            profiler.enable()
+            try:
+                for _ in response.streaming_content:
+                    pass
+            finally:
+                profiler.disable()
+
+        sort = request.GET.get("_profile_sort", "cumulative")
+        if sort not in pstats.SortKey._value2member_map_:
+            sort = "cumulative"
+        report = io.StringIO()
+        stats = pstats.Stats(profiler, stream=report)
+        stats.sort_stats(sort).print_stats(settings.PROFILE_MAX_LINES)
+
+        profile_response = HttpResponse(report.getvalue(), content_type="text/plain; charset=utf-8")
+        profile_response["X-Profiled-Status"] = str(response.status_code)
+        if settings.PROFILE_DUMP_DIR:
+            path = self.dump(request, stats, report.getvalue())
+            profile_response["X-Profile-Dump"] = path
+        return profile_response
+
+    def is_staff(self, request):
+        """
+        Resolves the caller before anything is profiled, so nobody else can
+        make a request pay for cProfile. Session users are known from
+        AuthenticationMiddleware; token and basic auth callers are run
+        through the API's authenticators here, as DRF would in the view.
+        """
+        user = getattr(request, "user", None)
+        if user is None or not user.is_authenticated:
+            authenticators = [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+            try:
+                user = Request(request, authenticators=authenticators).user
+            except APIException:
+                return False
+        return user.is_staff
+
+    def requested(self, request):
+        return request.GET.get("_profile") == "1" or request.headers.get("X-Profile") == "1"
+
+    def dump(self, request, stats, text):
+        os.makedirs(settings.PROFILE_DUMP_DIR, exist_ok=True)
+        slug = request.path.strip("/").replace("/", "_") or "root"
+        base = os.path.join(settings.PROFILE_DUMP_DIR, f"{timezone.now():%Y%m%d-%H%M%S-%f}-{request.method}-{slug}")
+        stats.dump_stats(f"{base}.prof")
+        with open(f"{base}.txt", "w") as f:
+            f.write(text)
+        return f"{base}.prof"
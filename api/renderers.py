@@ -0,0 +1,54 @@
+import orjson
+import msgpack
+from rest_framework import renderers
+from rest_framework.utils import encoders
+from utils.request_timing import timed
+
+# DRF's encoder already knows how to turn Decimal, lazy strings, timedeltas,
+# querysets, etc. into JSON-safe values, so both fast renderers fall back to it
+# for anything they can't serialize natively.
+_fallback_encoder = encoders.JSONEncoder()
+
+
+def default(obj):
+    return _fallback_encoder.default(obj)
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """
+    Drop-in replacement for DRF's JSONRenderer backed by orjson.
+    Natively handles datetime/date/UUID (the users.User pk) and falls back
+    to DRF's encoder for Decimal and friends.
+    """
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        options = self.options
+        # orjson only supports a 2 space indent, which is good enough for
+        # `?indent=` requests and the browsable API.
+        if self.get_indent(accepted_media_type, renderer_context):
+            options |= orjson.OPT_INDENT_2
+
+        with timed("render"):
+            return orjson.dumps(data, default=default, option=options)
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """
+    Opt-in MessagePack renderer for our own clients.
+    Selected with `Accept: application/msgpack` or `?format=msgpack`.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        with timed("render"):
+            return msgpack.packb(data, default=default, use_bin_type=True)
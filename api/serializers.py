@@ -0,0 +1,22 @@
+from rest_framework import serializers
+from utils.request_timing import timed
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with timed("serialize"):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    Records the time spent building `.data` in the request's `serialize`
+    Server-Timing span. Pair with `list_serializer_class = TimedListSerializer`
+    in Meta so many=True is timed as well.
+    """
+
+    @property
+    def data(self):
+        with timed("serialize"):
+            return super().data
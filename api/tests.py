@@ -1,3 +1,286 @@
-from django.test import TestCase
+import os
+import subprocess
+import sys
+from unittest import skipUnless
+from django.conf import settings
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+# Loaded on first use only (see utils/media_extractor.py, utils/g_drive*.py)
+LAZY_MODULES = ["yt_dlp", "googleapiclient", "google_auth_oauthlib"]
+
+# What a gunicorn worker does at boot: set up Django and load the URLconf,
+# which imports every view and serializer module.
+WORKER_BOOT = f"""
+import resource, sys, django
+django.setup()
+from django.urls import resolve
+resolve("/api/items/")
+print("rss_kb", resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+print("lazy_loaded", ",".join(m for m in {LAZY_MODULES!r} if m in sys.modules))
+"""
+
+
+def boot_worker():
+    """
+    Boots a fresh interpreter under `-X importtime` and returns its peak RSS
+    (KiB), the lazy modules it loaded anyway and the total import time (us).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", WORKER_BOOT],
+        capture_output=True, text=True, env=os.environ.copy(), check=True,
+    )
+    values = dict(line.split(" ", 1) for line in result.stdout.splitlines() if " " in line)
+    import_us = sum(
+        int(line.split("|")[1])
+        for line in result.stderr.splitlines()
+        # Top-level imports only, their cumulative time covers the nested ones
+        if line.startswith("import time:") and "|" in line
+        and not line.split("|")[2].startswith("  ") and line.split("|")[1].strip().isdigit()
+    )
+    return int(values["rss_kb"]), values.get("lazy_loaded", "").strip(), import_us
+
+
+class WorkerStartupTests(SimpleTestCase):
+    """
+    Keeps the cost of booting a worker in check. Budgets can be tightened
+    with STARTUP_MAX_RSS_MB / STARTUP_MAX_IMPORT_MS.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.rss_kb, cls.lazy_loaded, cls.import_us = boot_worker()
+
+    def test_heavy_dependencies_are_not_imported_at_boot(self):
+        self.assertEqual(self.lazy_loaded, "")
+
+    def test_boot_rss_within_budget(self):
+        budget_mb = int(os.getenv("STARTUP_MAX_RSS_MB", "150"))
+        self.assertLess(self.rss_kb / 1024, budget_mb)
+
+    def test_boot_import_time_within_budget(self):
+        budget_ms = int(os.getenv("STARTUP_MAX_IMPORT_MS", "3000"))
+        self.assertLess(self.import_us / 1000, budget_ms)
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        from utils.db_routing import ReplicaRouter
+
+        self.router = ReplicaRouter(replicas=["replica_1"])
+
+    def read_db(self):
+        from items.models import Item
+
+        return self.router.db_for_read(Item)
+
+    def run_request(self, method, cookies=None, write=False):
+        from django.test import RequestFactory, override_settings
+        from django.http import HttpResponse
+        from items.models import Item
+        from api.middleware import ReplicaRoutingMiddleware
+
+        reads = []
+
+        def view(request):
+            reads.append(self.read_db())
+            if write:
+                self.router.db_for_write(Item)
+                reads.append(self.read_db())
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)("/api/items/")
+        request.COOKIES.update(cookies or {})
+        with override_settings(DATABASE_REPLICAS=["replica_1"]):
+            response = ReplicaRoutingMiddleware(view)(request)
+        return reads, response
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(self.read_db(), "default")
+
+    def test_safe_request_reads_from_replica(self):
+        reads, response = self.run_request("get")
+        self.assertEqual(reads, ["replica_1"])
+        self.assertNotIn("db_pin", response.cookies)
+
+    def test_write_pins_rest_of_request_and_client_to_primary(self):
+        reads, response = self.run_request("get", write=True)
+        self.assertEqual(reads, ["replica_1", "default"])
+        self.assertEqual(response.cookies["db_pin"].value, "1")
+
+    def test_unsafe_request_reads_from_primary(self):
+        reads, response = self.run_request("post")
+        self.assertEqual(reads, ["default"])
+        self.assertIn("db_pin", response.cookies)
+
+    def test_pinned_client_reads_from_primary(self):
+        reads, _ = self.run_request("get", cookies={"db_pin": "1"})
+        self.assertEqual(reads, ["default"])
+
+    def test_replicas_are_never_migrated(self):
+        self.assertFalse(self.router.allow_migrate("replica_1", "items"))
+        self.assertIsNone(self.router.allow_migrate("default", "items"))
+
+
+@skipUnless(settings.DATABASE_REPLICAS, "no replicas configured (DB_REPLICA_HOSTS)")
+class ReplicaMirrorTests(TransactionTestCase):
+    """
+    Runs against the configured replica aliases, which the test runner
+    mirrors onto the test primary (TEST MIRROR). Not a TestCase: reads
+    inside its wrapping transaction would all stay on the primary.
+    """
+    databases = "__all__"
+
+    def test_list_served_from_replica_sees_primary_rows(self):
+        from rest_framework.test import APIClient
+        from items.models import Item
+        from users.models import User
+
+        user = User.objects.create_user("reader", "reader@example.com", "password")
+        Item.objects.create(owner=user, name="Mirrored", type="link")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        with CaptureQueriesContext(connections[settings.DATABASE_REPLICAS[0]]) as replica_queries:
+            response = client.get("/api/items/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["name"], "Mirrored")
+        self.assertTrue(replica_queries.captured_queries)
+
+
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from items.models import Item
+        from users.models import User
+
+        cls.user = User.objects.create_user("member", "member@example.com", "password")
+        cls.staff = User.objects.create_user("admin", "admin@example.com", "password", is_staff=True)
+        Item.objects.create(owner=cls.user, name="Exported", type="link")
+
+    def export(self, user, url):
+        from rest_framework.test import APIClient
+        from users.authentication import issue_token
+
+        client = APIClient()
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_token(user)}")
+        response = client.get(url)
+        return response, b"".join(response.streaming_content) if response.streaming else response.content
+
+    def test_non_staff_stream_is_left_untouched(self):
+        _, plain = self.export(self.user, "/api/export/")
+        response, body = self.export(self.user, "/api/export/?_profile=1")
+        self.assertTrue(plain)
+        self.assertEqual(body, plain)
+        self.assertNotIn("X-Profiled-Status", response)
+
+    def test_non_staff_requests_are_never_profiled(self):
+        from unittest import mock
+
+        with mock.patch("api.middleware.cProfile.Profile") as profile:
+            for user in (None, self.user):
+                self.export(user, "/api/export/?_profile=1")
+                self.export(user, "/api/items/?_profile=1")
+        profile.assert_not_called()
+
+    def test_staff_gets_profile_report(self):
+        response, body = self.export(self.staff, "/api/export/?_profile=1")
+        self.assertEqual(response["X-Profiled-Status"], "200")
+        self.assertIn(b"function calls", body)
+
+
+class RequestTimingsTests(SimpleTestCase):
+    def test_keeps_only_the_slowest_queries(self):
+        from utils.request_timing import RequestTimings, MAX_KEPT_QUERIES
+
+        timings = RequestTimings()
+        for i in range(1000):
+            timings.add_query(f"SELECT {i}", float(i % 500))
+
+        slowest = timings.slowest_queries()
+        self.assertEqual(len(slowest), MAX_KEPT_QUERIES)
+        self.assertEqual(slowest[0][1], 499.0)
+        self.assertEqual([ms for _, ms in slowest], sorted((ms for _, ms in slowest), reverse=True))
+
+
+class RequestIdTests(SimpleTestCase):
+    def test_error_response_log_carries_request_id(self):
+        import orjson
+        from utils.log_config import JSONFormatter
+
+        with self.assertLogs("django.request", level="WARNING") as logs:
+            response = self.client.get("/api/does-not-exist/", HTTP_X_REQUEST_ID="req-404")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response["X-Request-ID"], "req-404")
+        entry = orjson.loads(JSONFormatter().format(logs.records[0]))
+        self.assertEqual(entry["request_id"], "req-404")
+
+
+class MetricsViewTests(SimpleTestCase):
+    def test_only_allowed_addresses_or_token_holders_can_scrape(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+        with self.settings(METRICS_ALLOWED_IPS=["10.0.0.5"], METRICS_TOKEN=""):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+            self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="10.0.0.5").status_code, 200)
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer ").status_code, 403)
+
+        with self.settings(METRICS_ALLOWED_IPS=[], METRICS_TOKEN="scrape-secret"):
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+            response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret")
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(b"api_request_seconds", response.content)
+
+    def test_unknown_methods_share_one_label(self):
+        from utils.metrics import method_label
+
+        self.assertEqual(method_label("PATCH"), "PATCH")
+        self.assertEqual(method_label("PROPFIND"), "other")
+        self.client.generic("X-RANDOM-1", "/metrics")
+        self.client.generic("X-RANDOM-2", "/metrics")
+        body = self.client.get("/metrics").content.decode()
+        self.assertNotIn("X-RANDOM", body)
+        self.assertIn('method="other"', body)
+
+
+class RendererTests(TestCase):
+    def test_orjson_renders_decimal_uuid_and_datetime(self):
+        import datetime
+        import decimal
+        import uuid
+        from api.renderers import ORJSONRenderer
+
+        data = {
+            "price": decimal.Decimal("1.50"),
+            "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "at": datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+            "day": datetime.date(2024, 1, 2),
+        }
+        self.assertEqual(
+            ORJSONRenderer().render(data),
+            b'{"price":1.5,"id":"12345678-1234-5678-1234-567812345678",'
+            b'"at":"2024-01-02T03:04:05Z","day":"2024-01-02"}',
+        )
+
+    def test_msgpack_is_negotiated_by_format_or_accept(self):
+        import msgpack
+        from rest_framework.test import APIClient
+        from items.models import Item
+        from users.models import User
+
+        user = User.objects.create_user("reader", "reader@example.com", "password")
+        Item.objects.create(owner=user, name="packed", type="link")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        as_json = client.get("/api/items/", {"limit": 0})
+        self.assertEqual(as_json["Content-Type"], "application/json")
+        for response in (
+            client.get("/api/items/", {"limit": 0, "format": "msgpack"}),
+            client.get("/api/items/", {"limit": 0}, HTTP_ACCEPT="application/msgpack"),
+        ):
+            self.assertEqual(response["Content-Type"], "application/msgpack")
+            self.assertEqual(msgpack.unpackb(response.content), as_json.json())
@@ -1,7 +1,10 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path
 from users.views import UserViewSet
-from items.views import ItemViewSet, TagViewSet, LinkViewSet, FileGroupViewSet, FileViewSet, MediaURLViewSet
+from items.views import (
+    ItemViewSet, TagViewSet, LinkViewSet, FileGroupViewSet, FileViewSet, MediaURLViewSet,
+    LibraryExportView, LibraryImportView, SyncView,
+)
 from .views import media_proxy_view
 
 router = DefaultRouter()
@@ -15,4 +18,7 @@ router.register(r'files', FileViewSet)
 
 urlpatterns = router.urls + [
     path('proxy-media/', media_proxy_view, name='media-proxy'),
+    path('export/', LibraryExportView.as_view(), name='library-export'),
+    path('import/', LibraryImportView.as_view(), name='library-import'),
+    path('sync/', SyncView.as_view(), name='sync'),
 ]
@@ -1,7 +1,18 @@
+import hashlib
+import hmac
+import logging
+import os
 import requests
-from django.http import StreamingHttpResponse, HttpResponse, HttpResponseBadRequest
+from django.conf import settings
+from django.http import (
+    StreamingHttpResponse, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, HttpResponseNotModified,
+)
 from django.views.decorators.http import require_http_methods
 from urllib.parse import urlparse
+from utils.request_timing import timed
+from utils.metrics import PROXY_BYTES, PROXY_UPSTREAM_SECONDS, render_latest
+
+logger = logging.getLogger(__name__)
 
 # Allowed media domains to prevent your proxy from being abused
 ALLOWED_MEDIA_DOMAINS = [
@@ -29,26 +40,34 @@ def media_proxy_view(request):
 
         # 2. Make the streaming request to the external server
         # Crucially, we do NOT send the client's 'Referer' header.
-        response = requests.get(
-            external_url,
-            stream=True,
-            timeout=10, # Set a timeout
-            headers={
-                # Optional: Spoof the Referer header to the source site (often necessary)
-                'Referer': f'https://{parsed_url.netloc}/',
-                # Copy the User-Agent if needed, or set a generic one
-                'User-Agent': request.headers.get('User-Agent', 'Django-Media-Proxy')
-            }
-        )
+        # Time to upstream headers; the body is streamed after the view returns
+        with timed("proxy"), PROXY_UPSTREAM_SECONDS.labels(parsed_url.netloc).time():
+            response = requests.get(
+                external_url,
+                stream=True,
+                timeout=10, # Set a timeout
+                headers={
+                    # Optional: Spoof the Referer header to the source site (often necessary)
+                    'Referer': f'https://{parsed_url.netloc}/',
+                    # Copy the User-Agent if needed, or set a generic one
+                    'User-Agent': request.headers.get('User-Agent', 'Django-Media-Proxy')
+                }
+            )
         response.raise_for_status() # Raise exception for bad status codes (4xx or 5xx)
 
     except requests.exceptions.RequestException as e:
-        print(f"Proxy failed for {external_url}: {e}")
+        logger.warning("Proxy failed for %s: %s", external_url, e)
         return HttpResponse("Could not retrieve media file.", status=502)
 
     # 3. Define the generator for streaming the response chunks
     def file_iterator(file_handle, chunk_size=8192):
-        yield from file_handle.iter_content(chunk_size)
+        streamed = 0
+        try:
+            for chunk in file_handle.iter_content(chunk_size):
+                streamed += len(chunk)
+                yield chunk
+        finally:
+            PROXY_BYTES.labels(parsed_url.netloc).inc(streamed)
 
     # 4. Stream the response back to the client
     # Copy essential headers to let the client (Angular/Browser) know what it's receiving
@@ -76,3 +95,71 @@ def media_proxy_view(request):
     proxy_response['Expires'] = '0'
 
     return proxy_response
+
+
+def metrics_allowed(request):
+    if settings.METRICS_TOKEN:
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+            return True
+    return request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+
+
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint (text exposition format), for the addresses
+    in METRICS_ALLOWED_IPS or holders of METRICS_TOKEN.
+    """
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    body, content_type = render_latest()
+    return HttpResponse(body, content_type=content_type)
+
+
+# (mtime, body, etag) of the pre-generated schema file
+_schema_file_cache = {}
+
+
+def load_schema_file(path):
+    """
+    Reads the pre-generated schema once per file version.
+    Returns (body, etag), or None when the file doesn't exist.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    cached = _schema_file_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "rb") as f:
+            body = f.read()
+        cached = (mtime, body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        _schema_file_cache[path] = cached
+    return cached[1], cached[2]
+
+
+def precomputed_schema_view(fallback_view):
+    """
+    Serves settings.SCHEMA_FILE with an ETag (304 on If-None-Match), or
+    defers to `fallback_view` (the cached drf_yasg view) when the file
+    hasn't been generated.
+    """
+
+    @require_http_methods(["GET", "HEAD"])
+    def view(request, *args, **kwargs):
+        loaded = load_schema_file(settings.SCHEMA_FILE)
+        if loaded is None:
+            return fallback_view(request, *args, **kwargs)
+
+        body, etag = loaded
+        if etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type="application/json")
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+        return response
+
+    return view
@@ -0,0 +1,96 @@
+"""
+Production gunicorn settings, configured through the environment:
+
+    GUNICORN_BIND           address to bind (0.0.0.0:8000)
+    GUNICORN_WORKERS        worker processes (4)
+    GUNICORN_WORKER_CLASS   sync, gthread, ... (sync; gthread when GUNICORN_THREADS > 1)
+    GUNICORN_THREADS        threads per worker (1)
+    GUNICORN_TIMEOUT        worker timeout in seconds (60, extraction can take a while)
+    GUNICORN_PRELOAD        load the app in the master and fork workers from it (1)
+    GUNICORN_MAX_REQUESTS   recycle workers after this many requests (0 = never)
+
+With preload the master imports Django and primes shared caches once, and
+the workers share those pages copy-on-write. Each worker then opens its
+own DB connection and builds its own Drive client on first use.
+"""
+import os
+import shutil
+
+wsgi_app = "item_manager_api.wsgi:application"
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread" if threads > 1 else "sync")
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+# Must happen before the app is (pre)loaded: prometheus_client opens its
+# per-process files in this directory as soon as the metrics are defined.
+# Samples left over from a previous run are dropped.
+_prometheus_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if _prometheus_dir:
+    shutil.rmtree(_prometheus_dir, ignore_errors=True)
+    os.makedirs(_prometheus_dir, exist_ok=True)
+
+
+def warm_shared_caches():
+    """
+    Work every worker would otherwise repeat on its first request. Run in
+    the master when preloading, so the result is shared copy-on-write.
+    """
+    from django.conf import settings
+    from django.urls import get_resolver
+    from rest_framework.settings import api_settings
+    from api.views import load_schema_file
+
+    get_resolver()._populate()
+    # Resolves and imports the configured DRF classes
+    api_settings.DEFAULT_RENDERER_CLASSES
+    api_settings.DEFAULT_PARSER_CLASSES
+    api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    load_schema_file(settings.SCHEMA_FILE)
+
+
+def when_ready(server):
+    if preload_app:
+        warm_shared_caches()
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        # Never hand the master's DB sockets to a worker
+        from django.db import connections
+
+        connections.close_all()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        # Per-process state must not be inherited from the master
+        from utils.g_drive import reset_drive_service
+
+        reset_drive_service()
+
+
+def post_worker_init(worker):
+    from django.db import connections
+
+    if not preload_app:
+        warm_shared_caches()
+
+    # Open the worker's connections now rather than on its first request
+    # (they are kept when CONN_MAX_AGE allows it)
+    for connection in connections.all():
+        try:
+            connection.ensure_connection()
+        except Exception as e:
+            worker.log.warning("Worker %s could not pre-connect to %s: %s", worker.pid, connection.alias, e)
+
+
+def child_exit(server, worker):
+    from utils.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
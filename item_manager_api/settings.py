@@ -68,14 +68,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestIdMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.RequestTimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'item_manager_api.urls'
@@ -107,6 +111,10 @@ WSGI_APPLICATION = 'item_manager_api.wsgi.application'
 #         'NAME': BASE_DIR / 'db.sqlite3',
 #     }
 # }
+# Seconds a DB connection is kept open across requests
+# (0 = closed after every request, "none" = never closed)
+DB_CONN_MAX_AGE = os.getenv('DB_CONN_MAX_AGE', '60')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -115,11 +123,141 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('POSTGRES_HOST'),
         'PORT': os.getenv('POSTGRES_PORT'),
+        # Reuse connections across requests, checking them before reuse
+        'CONN_MAX_AGE': None if DB_CONN_MAX_AGE == 'none' else int(DB_CONN_MAX_AGE),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', '1') == '1',
     }
 }
 
+# Optional native connection pool (Django 5.1+), for gthread/async workers.
+# Needs psycopg 3 with the pool extra (`pip install "psycopg[pool]"`) in
+# place of psycopg2, and replaces persistent connections.
+if os.getenv('DB_POOL') == '1':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            'timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+        },
+    }
+
+# Read replicas: comma-separated host[:port] list, each added as replica_<n>
+# with the primary's credentials. Safe-method API reads are routed to them
+# (see utils.db_routing); tests mirror them onto the primary.
+DATABASE_REPLICAS = []
+for n, replica in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    host, _, port = replica.strip().partition(':')
+    DATABASES[f'replica_{n}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{n}')
+
+DATABASE_ROUTERS = ['utils.db_routing.ReplicaRouter']
+
+# Seconds a client keeps reading from the primary after a write
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '5'))
+
 AUTH_USER_MODEL = 'users.User'
 
+# /api/sync/ (utils/sync_service.py). updated_at is stamped when a row is
+# saved, not when its transaction commits, so rows newer than the lag are
+# held back. It must stay above the longest write transaction (import
+# batches, bulk tag edits, tag merges, card rebuilds) or clients skip rows.
+SYNC_SAFETY_LAG_SECONDS = int(os.getenv('SYNC_SAFETY_LAG_SECONDS', '60'))
+# Tombstones older than this are deleted by `manage.py prune_tombstones`;
+# cursors older than it get 410 and must do a full sync
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', '90'))
+
+# Requests slower than this (ms) log their full SQL (see api.middleware.RequestTimingMiddleware)
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', '1000'))
+
+# JSON log lines written off the request thread (see utils/log_config.py)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'utils.log_config.JSONFormatter'},
+    },
+    'filters': {
+        'rate_limit': {
+            '()': 'utils.log_config.RateLimitFilter',
+            'rate': int(os.getenv('LOG_RATE_LIMIT', '10')),
+            'period': 60,
+        },
+    },
+    'handlers': {
+        'queue': {
+            'class': 'utils.log_config.QueueLogHandler',
+            'formatter': 'json',
+            'filters': ['rate_limit'],
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}
+
+# OpenAPI schema: generated at image build time with
+# `manage.py generate_swagger $SCHEMA_FILE --overwrite --format json`, served by
+# api.views.precomputed_schema_view. Without the file (development) the schema
+# is generated on demand and cached for SCHEMA_CACHE_TIMEOUT seconds.
+SCHEMA_FILE = Path(os.getenv('SCHEMA_FILE', BASE_DIR / 'openapi.json'))
+SCHEMA_CACHE_TIMEOUT = int(os.getenv('SCHEMA_CACHE_TIMEOUT', '3600'))
+
+SWAGGER_SETTINGS.update({
+    'DEFAULT_INFO': 'item_manager_api.urls.api_info',
+    'SPEC_URL': 'schema-json',
+})
+REDOC_SETTINGS = {
+    'SPEC_URL': 'schema-json',
+}
+
+# /metrics is served to these client addresses (REMOTE_ADDR, so scrape the
+# web container directly; nginx refuses the path) or to requests with
+# `Authorization: Bearer <METRICS_TOKEN>` when a token is set
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Staff ?_profile=1 requests (see api.middleware.ProfilingMiddleware)
+PROFILE_DUMP_DIR = os.getenv('PROFILE_DUMP_DIR', '')
+PROFILE_MAX_LINES = int(os.getenv('PROFILE_MAX_LINES', '80'))
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'api.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'users.authentication.SignedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+}
+
+# Signed bearer tokens (users/authentication.py): lifetime, and how long a
+# worker trusts its cached token version, which bounds revocation delay
+API_TOKEN_MAX_AGE = int(os.getenv('API_TOKEN_MAX_AGE', str(24 * 3600)))
+API_TOKEN_CACHE_SECONDS = int(os.getenv('API_TOKEN_CACHE_SECONDS', '30'))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
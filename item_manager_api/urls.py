@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import RedirectView
@@ -5,13 +6,16 @@ from django.views.generic import RedirectView
 from rest_framework.permissions import AllowAny
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+from api.views import metrics_view, precomputed_schema_view
+
+api_info = openapi.Info(
+    title="Item Manager API",
+    default_version='v1',
+    description="API documentation and test portal",
+)
 
 schema_view = get_schema_view(
-    openapi.Info(
-        title="Item Manager API",
-        default_version='v1',
-        description="API documentation and test portal",
-    ),
+    api_info,
     public=True,
     permission_classes=(AllowAny,),
 )
@@ -20,6 +24,13 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', RedirectView.as_view(url='/docs/', permanent=False)),
     path('api/', include('api.urls')),
+    path('metrics', metrics_view, name='metrics'),
+    # The UI pages load the spec from here (SPEC_URL), see precomputed_schema_view
+    path(
+        'openapi.json',
+        precomputed_schema_view(schema_view.without_ui(cache_timeout=settings.SCHEMA_CACHE_TIMEOUT)),
+        name='schema-json',
+    ),
     path('docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ]
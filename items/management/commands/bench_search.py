@@ -0,0 +1,56 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from items.models import Item
+from items.views import ItemFilter
+from utils.synthetic_data import LibrarySeeder
+
+QUERIES = ["sunset", "beach dog", "python react", "/r/sub1/", "tag-42", "zzz-no-match"]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmarks ?q= item search on a synthetic library (rolled back afterwards)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        for size in options["sizes"]:
+            try:
+                with transaction.atomic():
+                    self.populate(size, options["batch_size"])
+                    self.run_queries(size, options["repeat"])
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def populate(self, size, batch_size):
+        start = time.perf_counter()
+        LibrarySeeder(users=1, seed=size, batch_size=batch_size).run(size)
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE items_item, items_tag, items_link, items_item_tags")
+        self.stdout.write(f"{size} items seeded in {time.perf_counter() - start:.1f} s")
+
+    def run_queries(self, size, repeat):
+        for q in QUERIES:
+            queryset = ItemFilter({"q": q}, queryset=Item.objects.order_by("-created_at", "id")).qs
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                count = queryset.count()
+                list(queryset.values_list("id", flat=True)[:50])
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(
+                f"  q={q!r:<18} matches {count:>8}  median {statistics.median(timings) * 1000:8.2f} ms"
+            )
+        if connection.vendor == "postgresql":
+            queryset = ItemFilter({"q": QUERIES[0]}, queryset=Item.objects.all()).qs
+            self.stdout.write(queryset.explain())
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from items.models import Item, Tag, MediaURL
+from items.views import ItemFilter
+
+# Index(es) each query shape is expected to use
+EXPECTED_INDEXES = {
+    "search": ("item_name_trgm_idx", "link_url_trgm_idx", "tag_name_trgm_idx"),
+    "list by -created_at": "item_created_id_idx",
+    "list by name": "item_name_id_idx",
+    "list by owner": "item_owner_created_id_idx",
+    "items for tag": "item_tags_tag_item_idx",
+    "tag item counts": "item_tags_tag_item_idx",
+    "media urls for links": "mediaurl_link_order_idx",
+}
+
+
+class Command(BaseCommand):
+    help = "Prints EXPLAIN (ANALYZE on Postgres) for the main item query shapes on the current data."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--no-analyze", action="store_true", help="Plan only, don't execute the queries")
+
+    def handle(self, *args, **options):
+        item = Item.objects.order_by("id").first()
+        tag = Tag.objects.annotate(n=Count("items")).order_by("-n").first()
+        if item is None or tag is None:
+            self.stderr.write("No items/tags to explain, seed the database first.")
+            return
+
+        Through = Item.tags.through
+        link_ids = list(Item.objects.filter(link__isnull=False).values_list("link__id", flat=True)[:50])
+        queries = {
+            "search": ItemFilter(data={"q": "cat"}, queryset=Item.objects.all()).qs.values("id")[:50],
+            "list by -created_at": Item.objects.order_by("-created_at", "-id").values("id")[:50],
+            "list by name": Item.objects.order_by("name", "id").values("id")[:50],
+            "list by owner": Item.objects.filter(owner_id=item.owner_id).order_by("-created_at", "-id").values("id")[:50],
+            "items for tag": Through.objects.filter(tag_id=tag.id).values("item_id"),
+            "tag item counts": Through.objects.filter(tag_id__in=[tag.id]).values("tag_id").annotate(n=Count("item_id")),
+            "media urls for links": MediaURL.objects.filter(link_id__in=link_ids).order_by("link_id", "order"),
+        }
+
+        explain_options = {}
+        if connection.vendor == "postgresql" and not options["no_analyze"]:
+            explain_options = {"analyze": True, "buffers": True}
+
+        for label, queryset in queries.items():
+            plan = queryset.explain(**explain_options)
+            expected = EXPECTED_INDEXES[label]
+            if isinstance(expected, str):
+                expected = (expected,)
+            missing = [name for name in expected if name not in plan]
+            status = f"DOES NOT use {', '.join(missing)}" if missing else f"uses {', '.join(expected)}"
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{label}: {status}"))
+            self.stdout.write(plan)
+            self.stdout.write("")
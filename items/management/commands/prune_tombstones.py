@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from utils.sync_service import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Deletes sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.SYNC_TOMBSTONE_RETENTION_DAYS,
+            help="Keep tombstones from the last N days.",
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones(options["days"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstones older than {options['days']} days."))
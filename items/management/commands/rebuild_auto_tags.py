@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from items.models import Item
+from utils.tag_service import auto_tag_queryset, bulk_auto_tag_items
+
+
+class Command(BaseCommand):
+    help = "Recomputes the src-, subreddit- and user- tags for every item in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would change.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        dry_run = options["dry_run"]
+        total = Item.objects.count()
+        totals = {"processed": 0, "changed": 0, "added": 0, "removed": 0, "failed": 0}
+        last_id = 0
+
+        while True:
+            # Keyset pagination over ids keeps every chunk an index range scan
+            items = list(auto_tag_queryset(
+                Item.objects.filter(id__gt=last_id).order_by("id")
+            )[:chunk_size])
+            if not items:
+                break
+            last_id = items[-1].id
+
+            result = bulk_auto_tag_items(items, dry_run=dry_run)
+            totals["processed"] += len(items)
+            for key, value in result.items():
+                totals[key] += value
+
+            self.stdout.write(
+                f"{totals['processed']}/{total} items, {totals['changed']} changed "
+                f"(+{totals['added']} / -{totals['removed']} tag rows)"
+            )
+
+        prefix = "[dry run] Would update" if dry_run else "Updated"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {totals['changed']} of {totals['processed']} items: "
+            f"+{totals['added']} / -{totals['removed']} tag rows, {totals['failed']} skipped (bad link URL)."
+        ))
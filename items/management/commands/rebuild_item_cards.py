@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from items.models import Item
+from utils.card_service import refresh_item_cards
+
+
+class Command(BaseCommand):
+    help = "Backfills the denormalized Item.card projection used by the gallery list."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--missing-only",
+            action="store_true",
+            help="Only build cards that are missing or were invalidated.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        queryset = Item.objects.all()
+        if options["missing_only"]:
+            queryset = queryset.filter(card__isnull=True)
+
+        ids = list(queryset.order_by("id").values_list("id", flat=True))
+        total = len(ids)
+        done = 0
+
+        for start in range(0, total, chunk_size):
+            chunk = ids[start:start + chunk_size]
+            done += refresh_item_cards(Item.objects.filter(id__in=chunk), chunk_size=chunk_size)
+            self.stdout.write(f"{done}/{total} cards rebuilt")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {done} item cards."))
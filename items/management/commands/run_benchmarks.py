@@ -0,0 +1,119 @@
+import json
+import math
+import resource
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from items.models import Item, Tag
+from users.models import User
+from utils.synthetic_data import LibrarySeeder
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def peak_rss_kb():
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the main API endpoints and prints p50/p95/p99 latency, query counts and peak RSS as JSON. "
+        "With --sizes the library is first topped up with synthetic items to each size: use a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="*", default=[], help="Library sizes to seed up to, e.g. 1000 10000 100000 1000000")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(is_staff=True).first() or User.objects.create_user(
+            "bench", "bench@example.com", None, is_staff=True
+        )
+        self.client = APIClient(HTTP_HOST="localhost")
+        self.client.force_authenticate(user)
+
+        runs = []
+        sizes = sorted(options["sizes"]) or [None]
+        seeder = LibrarySeeder(seed=options["seed"])
+        for size in sizes:
+            if size is not None:
+                missing = size - Item.objects.count()
+                if missing > 0:
+                    self.stderr.write(f"Seeding {missing} items...")
+                    seeder.run(missing)
+            runs.append(self.run_size(options["repeat"], options["warmup"]))
+
+        report = json.dumps({"vendor": connection.vendor, "runs": runs}, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(report)
+        else:
+            self.stdout.write(report)
+
+    def endpoints(self):
+        total = Item.objects.count()
+        item = Item.objects.filter(link__isnull=False).order_by("id")[total // 2:].first()
+        file_item = Item.objects.filter(file_group__isnull=False).order_by("id").first()
+        tag = Tag.objects.filter(name="tag-0").first() or Tag.objects.order_by("id").first()
+
+        endpoints = {
+            "items_page": "/api/items/?limit=50",
+            "items_deep_page": f"/api/items/?limit=50&offset={total // 2}",
+            "items_ordered_by_name": "/api/items/?limit=50&ordering=name",
+            "items_cards": "/api/items/?limit=50&mode=card",
+            "items_search": "/api/items/?limit=50&q=sunset",
+            "tags": "/api/tags/",
+            "tags_autocomplete": "/api/tags/autocomplete/?q=tag-1",
+        }
+        if tag:
+            endpoints["items_tag_filtered"] = f"/api/items/?limit=50&tag_names={tag.name}"
+            endpoints["tags_facets"] = f"/api/tags/facets/?tag_names={tag.name}"
+        if item:
+            endpoints["item_detail"] = f"/api/items/{item.id}/"
+            endpoints["item_neighbors"] = f"/api/items/{item.id}/neighbors/"
+            endpoints["link_detail"] = f"/api/links/{item.link.id}/"
+            if tag:
+                endpoints["item_neighbors_filtered"] = f"/api/items/{item.id}/neighbors/?tag_names={tag.name}"
+        if file_item:
+            endpoints["file_group_detail"] = f"/api/file-groups/{file_item.file_group.id}/"
+        return total, endpoints
+
+    def run_size(self, repeat, warmup):
+        total, endpoints = self.endpoints()
+        results = {}
+        for name, url in endpoints.items():
+            for _ in range(warmup):
+                self.client.get(url)
+
+            timings = []
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = self.client.get(url)
+                    timings.append((time.perf_counter() - start) * 1000)
+
+            timings.sort()
+            results[name] = {
+                "url": url,
+                "status": response.status_code,
+                "queries": len(queries.captured_queries),
+                "p50_ms": round(percentile(timings, 50), 2),
+                "p95_ms": round(percentile(timings, 95), 2),
+                "p99_ms": round(percentile(timings, 99), 2),
+                "peak_rss_kb": peak_rss_kb(),
+            }
+            self.stderr.write(f"  {total} items  {name:<26} p50 {results[name]['p50_ms']:8.2f} ms")
+
+        return {"items": total, "endpoints": results, "peak_rss_kb": peak_rss_kb()}
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from utils.synthetic_data import LibrarySeeder
+
+
+class Command(BaseCommand):
+    help = "Seeds a synthetic library (users, items, Zipf-distributed tags, links, media URLs, files) without network access."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=1000)
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--tags", type=int, default=1000, help="Size of the manual tag vocabulary")
+        parser.add_argument("--tags-per-item", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        seeder = LibrarySeeder(
+            users=options["users"],
+            tags=options["tags"],
+            tags_per_item=options["tags_per_item"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+        )
+        result = seeder.run(
+            options["items"],
+            progress=lambda written: self.stdout.write(f"  {written}/{options['items']} items"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Seeded {result['items']} items for {result['users']} users."))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:51
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0008_auto_20260113_1830'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='card',
+            field=models.JSONField(blank=True, editable=False, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Trigram GIN indexes for ItemFilter.filter_search (?q=). Django renders
+# `icontains` on Postgres as UPPER(col::text) LIKE UPPER(%s), so the indexes
+# are built on that exact expression. Other backends (e.g. SQLite in tests)
+# skip them and fall back to plain LIKE scans.
+SEARCH_INDEXES = [
+    ("item_name_trgm_idx", "items_item", "name"),
+    ("tag_name_trgm_idx", "items_tag", "name"),
+    ("link_url_trgm_idx", "items_link", "url"),
+]
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for index_name, table, column in SEARCH_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{table}" '
+            f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for index_name, _, _ in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{index_name}"')
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0010_sync_updated_at_tombstone'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
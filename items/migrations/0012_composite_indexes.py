@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0011_search_trigram_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['created_at', 'id'], name='item_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['name', 'id'], name='item_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['owner', 'created_at', 'id'], name='item_owner_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mediaurl',
+            index=models.Index(fields=['link', 'order'], name='mediaurl_link_order_idx'),
+        ),
+        # The auto-created through table only has (item_id, tag_id) unique plus
+        # single-column FK indexes; tag-side probes want (tag_id, item_id).
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "item_tags_tag_item_idx" ON "items_item_tags" ("tag_id", "item_id")',
+            'DROP INDEX IF EXISTS "item_tags_tag_item_idx"',
+        ),
+    ]
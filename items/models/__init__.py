@@ -4,3 +4,4 @@ from .link import Link
 from .file_group import FileGroup
 from .file import File
 from .media_url import MediaURL
+from .tombstone import Tombstone
@@ -1,15 +1,24 @@
+import logging
 from django.db import models
 from django.db.models.signals import pre_delete
 from django.dispatch import receiver
 from items.models.file_group import FileGroup
 from utils.g_drive import rename_local_drive_file, rename_drive_file
 
+logger = logging.getLogger(__name__)
+
 class File(models.Model):
     file_group = models.ForeignKey(FileGroup, on_delete=models.CASCADE, related_name="files")
     file_name = models.CharField(max_length=255)
     file_type = models.CharField(max_length=50, blank=True)
     file_origin = models.CharField(max_length=255, blank=True)
     file_url = models.URLField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["updated_at", "id"], name="file_updated_id_idx"),
+        ]
 
     def __str__(self):
         return self.file_name
@@ -35,4 +44,4 @@ def rename_file_before_delete(sender, instance, **kwargs):
                     file_id = parts[parts.index('d') + 1]
                     rename_drive_file(file_id, new_name)
             except Exception as e:
-                print(f"Signal Rename failed: {e}")
+                logger.error("Signal Rename failed for %s: %s", instance.file_name, e)
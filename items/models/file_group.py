@@ -5,6 +5,12 @@ from items.models.item import Item
 class FileGroup(models.Model):
     item = models.OneToOneField(Item, on_delete=models.CASCADE, related_name="file_group")
     description = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["updated_at", "id"], name="filegroup_updated_id_idx"),
+        ]
 
     # def clean(self):
     #     # Ensure item type matches
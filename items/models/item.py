@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from items.models.tag import Tag
 
 class Item(models.Model):
@@ -19,6 +20,22 @@ class Item(models.Model):
     tags = models.ManyToManyField(Tag, related_name="items", blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Denormalized "item card" (item + tags + link/media + file group/files)
+    # kept up to date by items/signals.py and read by the gallery list.
+    card = models.JSONField(null=True, blank=True, editable=False, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        indexes = [
+            # Keyset scans for /api/sync/
+            models.Index(fields=["updated_at", "id"], name="item_updated_id_idx"),
+            # Default list ordering (-created_at, -id) and ?ordering=name
+            models.Index(fields=["created_at", "id"], name="item_created_id_idx"),
+            models.Index(fields=["name", "id"], name="item_name_id_idx"),
+            # Owner-scoped listings in the default order, see get_owner_scope()
+            models.Index(fields=["owner", "created_at", "id"], name="item_owner_created_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.type})"
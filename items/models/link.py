@@ -5,6 +5,12 @@ class Link(models.Model):
     item = models.OneToOneField(Item, on_delete=models.CASCADE, related_name="link")
     url = models.URLField(unique=True)
     media_url = models.URLField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["updated_at", "id"], name="link_updated_id_idx"),
+        ]
 
     def __str__(self):
         return f"Link: {self.url}"
@@ -29,8 +29,15 @@ class MediaURL(models.Model):
     # For sorting or display order
     order = models.PositiveSmallIntegerField(default=0) 
 
+    updated_at = models.DateTimeField(auto_now=True)
+
     class Meta:
         ordering = ['order', 'id']
+        indexes = [
+            models.Index(fields=["updated_at", "id"], name="mediaurl_updated_id_idx"),
+            # media_urls prefetch: WHERE link_id IN (...) ORDER BY order
+            models.Index(fields=["link", "order"], name="mediaurl_link_order_idx"),
+        ]
 
     def __str__(self):
         return f"{self.link.item.name} - {self.media_type} URL"
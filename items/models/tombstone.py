@@ -0,0 +1,36 @@
+from django.db import models
+from django.conf import settings
+
+class Tombstone(models.Model):
+    """
+    Deletion log read by /api/sync/ so offline clients can drop rows
+    that no longer exist. Written by the post_delete signals in items/signals.py.
+    """
+    MODEL_CHOICES = [
+        ("item", "Item"),
+        ("link", "Link"),
+        ("media_url", "Media URL"),
+        ("file_group", "File Group"),
+        ("file", "File"),
+    ]
+
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    # Plain ids: the rows they pointed to are gone
+    item_id = models.BigIntegerField(null=True, blank=True)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        null=True,
+        blank=True,
+    )
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["deleted_at", "id"], name="tombstone_deleted_id_idx"),
+        ]
+
+    def __str__(self):
+        return f"Deleted {self.model} {self.object_id}"
@@ -1,4 +1,5 @@
-from typing import List, Optional
+from typing import Iterable, List, Optional, Set
+from django.db.models import Prefetch
 from rest_framework import serializers
 from urllib.parse import urlparse
 from .models.item import Item
@@ -10,11 +11,14 @@ from .models.file import File
 from utils.url_refiner import refine_url
 from utils.media_extractor import get_media_details
 from utils.domain_urls import REDDIT_DOMAINS, TWITTER_DOMAINS
-from utils.tag_service import auto_tag_item_from_src
+from utils.tag_service import auto_tag_item_from_src, set_item_tags
+from utils.card_service import schedule_card_refresh
+from api.serializers import TimedSerializerMixin, TimedListSerializer
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
+        list_serializer_class = TimedListSerializer
         fields: List[str] = ["id", "name"]
 
     def validate_name(self, value: str) -> str:
@@ -23,7 +27,24 @@ class TagSerializer(serializers.ModelSerializer):
         return value
 
 
-class ItemSerializer(serializers.ModelSerializer):
+def validate_tag_name_list(names: List[str]) -> List[str]:
+    if any("," in name for name in names):
+        raise serializers.ValidationError("Commas are not allowed in tag names.")
+    return names
+
+
+class TagMergeSerializer(serializers.Serializer):
+    into = serializers.PrimaryKeyRelatedField(queryset=Tag.objects.all(), help_text="Tag that receives the items")
+
+
+class TagRenameSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=100)
+
+    def validate_name(self, value: str) -> str:
+        return validate_tag_name_list([value])[0]
+
+
+class ItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     tags = serializers.SlugRelatedField(
         many=True,
         read_only=True,
@@ -46,10 +67,96 @@ class ItemSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Item
+        list_serializer_class = TimedListSerializer
         fields: List[str] = [
             "id", "owner", "name", "type", "date_of_origin",
-            "tags", "tag_names", "created_at", "link_id", "file_group_id"
+            "tags", "tag_names", "created_at", "updated_at", "link_id", "file_group_id"
+        ]
+
+    # Relations that can be embedded inline with ?expand=
+    EXPANDABLE: Set[str] = {"link", "link.media_urls", "file_group", "file_group.files"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Sparse fieldsets and expansions are passed in by the view (?fields=, ?expand=)
+        fields = self.context.get("fields")
+        expand = self.normalize_expand(self.context.get("expand"))
+
+        if "link" in expand:
+            link_serializer = LinkSerializer(read_only=True)
+            if "link.media_urls" not in expand:
+                link_serializer.fields.pop("media_urls")
+            self.fields["link"] = link_serializer
+
+        if "file_group" in expand:
+            file_group_serializer = FileGroupSerializer(read_only=True)
+            if "file_group.files" not in expand:
+                file_group_serializer.fields.pop("files")
+            self.fields["file_group"] = file_group_serializer
+
+        if fields:
+            # Expanded relations are always kept
+            allowed = set(fields) | {"id"} | expand
+            for name in set(self.fields) - allowed:
+                self.fields.pop(name)
+
+    @classmethod
+    def normalize_expand(cls, expand: Optional[Iterable[str]]) -> Set[str]:
+        """
+        Drops unknown expansions and adds the parents of nested ones,
+        e.g. 'link.media_urls' also expands 'link'.
+        """
+        normalized = set()
+        for path in expand or ():
+            if path in cls.EXPANDABLE:
+                normalized.add(path)
+                normalized.add(path.split(".")[0])
+        return normalized
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields: Optional[Iterable[str]] = None, expand: Optional[Iterable[str]] = None):
+        """
+        Applies only the select_related/prefetch_related/only() the requested
+        fields and expansions need, so a page costs a fixed number of queries.
+        """
+        expand = cls.normalize_expand(expand)
+        wanted = (set(fields) if fields else set(cls.Meta.fields)) | {"id"} | expand
+
+        columns = [
+            name for name in ("id", "owner", "name", "type", "date_of_origin", "created_at", "updated_at")
+            if name in wanted
         ]
+        select_related = []
+        prefetch_related = []
+
+        if "tags" in wanted:
+            prefetch_related.append(Prefetch("tags", queryset=Tag.objects.only("id", "name")))
+
+        if "link" in expand:
+            select_related.append("link")
+            columns += [f"link__{f.attname}" for f in Link._meta.concrete_fields]
+        elif "link_id" in wanted:
+            select_related.append("link")
+            columns.append("link__id")
+        if "link.media_urls" in expand:
+            prefetch_related.append("link__media_urls")
+
+        if "file_group" in expand:
+            select_related.append("file_group")
+            columns += [f"file_group__{f.attname}" for f in FileGroup._meta.concrete_fields]
+        elif "file_group_id" in wanted:
+            select_related.append("file_group")
+            columns.append("file_group__id")
+        if "file_group.files" in expand:
+            prefetch_related.append("file_group__files")
+
+        return (
+            queryset
+            .select_related(*select_related)
+            .prefetch_related(*prefetch_related)
+            .only(*columns)
+        )
 
     def create(self, validated_data: dict) -> Item:
         # Pop non-model fields
@@ -66,8 +173,7 @@ class ItemSerializer(serializers.ModelSerializer):
 
         # Handle manual tags
         if tag_names:
-            tags = [Tag.objects.get_or_create(name=name)[0] for name in tag_names]
-            item.tags.set(tags)
+            set_item_tags(item, tag_names)
 
         return item
 
@@ -84,36 +190,35 @@ class ItemSerializer(serializers.ModelSerializer):
         # Use super() to update all other model fields (name, type, origin, etc.)
         instance = super().update(instance, validated_data)
 
-        # Handle manual tags
-        if tag_names is not None:
-            tags = [Tag.objects.get_or_create(name=name)[0] for name in tag_names]
-            instance.tags.set(tags)
-
-        # Re apply auto tags for source
+        # Handle manual tags and re apply auto tags for source in one tag diff
         link = Link.objects.filter(item=instance).first()
         file_group = FileGroup.objects.filter(item=instance).first()
         if link or file_group:
             link_url = link.url if link else None
-            auto_tag_item_from_src(instance, link_url, file_group)
+            auto_tag_item_from_src(instance, link_url, file_group, tag_names=tag_names)
+        elif tag_names is not None:
+            set_item_tags(instance, tag_names)
 
         return instance
 
     def get_link_id(self, obj: Item) -> Optional[int]:
-        link: Optional[Link] = Link.objects.filter(item=obj).first()
+        # Reverse one-to-one access uses the select_related cache when present
+        link: Optional[Link] = getattr(obj, "link", None)
         return link.id if link else None
 
     def get_file_group_id(self, obj: Item) -> Optional[int]:
-        file_group: Optional[FileGroup] = FileGroup.objects.filter(item=obj).first()
+        file_group: Optional[FileGroup] = getattr(obj, "file_group", None)
         return file_group.id if file_group else None
 
 
-class MediaURLSerializer(serializers.ModelSerializer):
+class MediaURLSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     link = serializers.PrimaryKeyRelatedField(queryset=Link.objects.all())
     hd_url_domain = serializers.SerializerMethodField(read_only=True)
     sd_url_domain = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = MediaURL
+        list_serializer_class = TimedListSerializer
         fields = ["id", "link", "url", "hd_url", "hd_url_domain", "sd_url", "sd_url_domain", "media_type", "order"]
 
     def get_hd_url_domain(self, obj: Link) -> Optional[str]:
@@ -128,7 +233,7 @@ class MediaURLSerializer(serializers.ModelSerializer):
             return parsed.netloc.lower()
         return None
 
-class LinkSerializer(serializers.ModelSerializer):
+class LinkSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     item = serializers.PrimaryKeyRelatedField(queryset=Item.objects.all())
     media_url = serializers.CharField(read_only=True)
     url_domain = serializers.SerializerMethodField(read_only=True)
@@ -138,6 +243,7 @@ class LinkSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Link
+        list_serializer_class = TimedListSerializer
         fields: List[str] = [
             "id", 
             "item", 
@@ -199,6 +305,9 @@ class LinkSerializer(serializers.ModelSerializer):
             ]
             MediaURL.objects.bulk_create(media_objects)
 
+            # bulk_create skips signals, so refresh the item card explicitly
+            schedule_card_refresh(Item.objects.filter(pk=link.item_id))
+
         return link
 
     def update(self, instance: Link, validated_data: dict) -> Link:
@@ -226,6 +335,9 @@ class LinkSerializer(serializers.ModelSerializer):
             ]
             MediaURL.objects.bulk_create(media_objects)
 
+            # bulk_create skips signals, so refresh the item card explicitly
+            schedule_card_refresh(Item.objects.filter(pk=link.item_id))
+
         return link
 
     def get_url_domain(self, obj: Link) -> Optional[str]:
@@ -241,9 +353,10 @@ class LinkSerializer(serializers.ModelSerializer):
         return None
 
 
-class FileSerializer(serializers.ModelSerializer):
+class FileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = File
+        list_serializer_class = TimedListSerializer
         fields: List[str] = ["id", "file_name", "file_type", "file_origin", "file_url"]
 
     def validate_item(self, value: Item) -> Item:
@@ -252,10 +365,31 @@ class FileSerializer(serializers.ModelSerializer):
         return value
 
 
-class FileGroupSerializer(serializers.ModelSerializer):
+class FileGroupSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     item = serializers.PrimaryKeyRelatedField(queryset=Item.objects.all())
     files = FileSerializer(many=True, read_only=True)
 
     class Meta:
         model = FileGroup
+        list_serializer_class = TimedListSerializer
         fields: List[str] = ["id", "item", "description", "files"]
+
+
+class BulkTagSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    tag_names = serializers.CharField(required=False, help_text="Comma-separated tag filter, as for /api/items/?tag_names=")
+    add = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    remove = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+
+    def validate_add(self, value: List[str]) -> List[str]:
+        return validate_tag_name_list(value)
+
+    def validate_remove(self, value: List[str]) -> List[str]:
+        return validate_tag_name_list(value)
+
+    def validate(self, attrs: dict) -> dict:
+        if ("ids" in attrs) == ("tag_names" in attrs):
+            raise serializers.ValidationError("Provide exactly one of 'ids' or 'tag_names'.")
+        if not attrs["add"] and not attrs["remove"]:
+            raise serializers.ValidationError("Provide tag names to 'add' and/or 'remove'.")
+        return attrs
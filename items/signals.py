@@ -0,0 +1,135 @@
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from items.models import Item, Tag, Link, MediaURL, FileGroup, File
+from utils.card_service import schedule_card_refresh, invalidate_item_cards
+from utils.sync_service import touch_items, record_tombstone
+
+# Keeps the denormalized Item.card projection and the /api/sync/ change log
+# (updated_at + tombstones) in sync with the related rows.
+# Bulk operations (bulk_create, queryset.update) don't fire these signals and
+# must refresh or invalidate the cards and touch updated_at themselves.
+
+
+@receiver(post_save, sender=Item)
+def refresh_card_on_item_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_card_refresh(Item.objects.filter(pk=instance.pk))
+
+
+@receiver(m2m_changed, sender=Item.tags.through)
+def refresh_card_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # tag.items.clear(): the affected items are only known before the clear
+        items = Item.objects.filter(tags=instance)
+        touch_items(items)
+        invalidate_item_cards(items)
+    elif action in ("post_add", "post_remove", "post_clear"):
+        if action != "post_clear" and not pk_set:
+            # add()/remove() of rows that were already there (or not there)
+            return
+        if not reverse:
+            items = Item.objects.filter(pk=instance.pk)
+        elif pk_set:
+            # tag.items.add(...) / tag.items.remove(...)
+            items = Item.objects.filter(pk__in=pk_set)
+        else:
+            return
+        touch_items(items)
+        schedule_card_refresh(items)
+
+
+@receiver(post_save, sender=Tag)
+def invalidate_cards_on_tag_rename(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    items = Item.objects.filter(tags=instance)
+    touch_items(items)
+    invalidate_item_cards(items)
+
+
+@receiver(pre_delete, sender=Tag)
+def invalidate_cards_on_tag_delete(sender, instance, **kwargs):
+    # The through rows are cascade-deleted without m2m_changed
+    items = Item.objects.filter(tags=instance)
+    touch_items(items)
+    invalidate_item_cards(items)
+
+
+@receiver(post_save, sender=Link)
+@receiver(post_delete, sender=Link)
+@receiver(post_save, sender=FileGroup)
+@receiver(post_delete, sender=FileGroup)
+def refresh_card_on_item_relation_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_card_refresh(Item.objects.filter(pk=instance.item_id))
+
+
+@receiver(post_save, sender=MediaURL)
+@receiver(post_delete, sender=MediaURL)
+def refresh_card_on_media_url_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_card_refresh(Item.objects.filter(link__id=instance.link_id))
+
+
+@receiver(post_save, sender=File)
+@receiver(post_delete, sender=File)
+def refresh_card_on_file_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_card_refresh(Item.objects.filter(file_group__id=instance.file_group_id))
+
+
+def deleting_owner(origin):
+    """
+    Whether the delete cascades from deleting users. Their tombstones would
+    point at the owner being deleted (already collected, so the insert breaks
+    the FK), and nobody is left to sync them anyway.
+    """
+    User = get_user_model()
+    if isinstance(origin, QuerySet):
+        return origin.model is User
+    return isinstance(origin, User)
+
+
+@receiver(post_delete, sender=Item)
+def record_item_tombstone(sender, instance, origin=None, **kwargs):
+    if deleting_owner(origin):
+        return
+    record_tombstone("item", instance.pk, item_id=instance.pk, owner_id=instance.owner_id)
+
+
+@receiver(post_delete, sender=Link)
+def record_link_tombstone(sender, instance, origin=None, **kwargs):
+    if deleting_owner(origin):
+        return
+    owner_id = Item.objects.filter(pk=instance.item_id).values_list("owner_id", flat=True).first()
+    record_tombstone("link", instance.pk, item_id=instance.item_id, owner_id=owner_id)
+
+
+@receiver(post_delete, sender=FileGroup)
+def record_file_group_tombstone(sender, instance, origin=None, **kwargs):
+    if deleting_owner(origin):
+        return
+    owner_id = Item.objects.filter(pk=instance.item_id).values_list("owner_id", flat=True).first()
+    record_tombstone("file_group", instance.pk, item_id=instance.item_id, owner_id=owner_id)
+
+
+@receiver(post_delete, sender=MediaURL)
+def record_media_url_tombstone(sender, instance, origin=None, **kwargs):
+    if deleting_owner(origin):
+        return
+    item_id, owner_id = Item.objects.filter(link__id=instance.link_id).values_list("id", "owner_id").first() or (None, None)
+    record_tombstone("media_url", instance.pk, item_id=item_id, owner_id=owner_id)
+
+
+@receiver(post_delete, sender=File)
+def record_file_tombstone(sender, instance, origin=None, **kwargs):
+    if deleting_owner(origin):
+        return
+    item_id, owner_id = Item.objects.filter(file_group__id=instance.file_group_id).values_list("id", "owner_id").first() or (None, None)
+    record_tombstone("file", instance.pk, item_id=item_id, owner_id=owner_id)
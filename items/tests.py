@@ -1,3 +1,429 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from users.models import User
+from items.models import Item, Tag, Link
+from utils.tag_service import get_or_create_tags, set_item_tags, auto_tag_item_from_src
 
-# Create your tests here.
+
+class TagServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", "owner@example.com", "password")
+        cls.item = Item.objects.create(owner=cls.user, name="Post", type="link")
+        Link.objects.create(item=cls.item, url="https://www.reddit.com/r/pics/comments/abc123")
+        cls.item.tags.set(get_or_create_tags(["a", "b", "src-reddit", "subreddit-pics"]).values())
+
+    def tag_names(self):
+        return set(self.item.tags.values_list("name", flat=True))
+
+    def test_get_or_create_tags_existing_is_one_query(self):
+        with self.assertNumQueries(1):
+            tags = get_or_create_tags(["a", "b"])
+        self.assertEqual(set(tags), {"a", "b"})
+
+    def test_get_or_create_tags_creates_missing_in_bulk(self):
+        with self.assertNumQueries(3):
+            tags = get_or_create_tags(["a", "new-1", "new-2"])
+        self.assertEqual(set(tags), {"a", "new-1", "new-2"})
+        self.assertTrue(Tag.objects.filter(name="new-2").exists())
+
+    def test_set_item_tags_unchanged_is_read_only(self):
+        with self.assertNumQueries(1):
+            set_item_tags(self.item, ["a", "b", "src-reddit", "subreddit-pics"])
+
+    def test_set_item_tags_unchanged_with_prefetch_costs_nothing(self):
+        item = Item.objects.prefetch_related("tags").get(pk=self.item.pk)
+        with self.assertNumQueries(0):
+            set_item_tags(item, ["a", "b", "src-reddit", "subreddit-pics"])
+
+    def test_set_item_tags_applies_only_the_diff(self):
+        set_item_tags(self.item, ["a", "c", "src-reddit", "subreddit-pics"])
+        self.assertEqual(self.tag_names(), {"a", "c", "src-reddit", "subreddit-pics"})
+
+    def test_auto_tag_unchanged_is_read_only(self):
+        with self.assertNumQueries(1):
+            auto_tag_item_from_src(self.item, self.item.link.url, None)
+        self.assertEqual(self.tag_names(), {"a", "b", "src-reddit", "subreddit-pics"})
+
+    def test_auto_tag_replaces_manual_and_auto_tags_in_one_pass(self):
+        auto_tag_item_from_src(
+            self.item,
+            "https://twitter.com/someone/status/123",
+            None,
+            tag_names=["b", "c", "subreddit-stale"],
+        )
+        self.assertEqual(self.tag_names(), {"b", "c", "src-twitter", "user-someone"})
+
+
+class LibrarySeederTests(TestCase):
+    def test_seeds_items_with_links_or_file_groups_and_skewed_tags(self):
+        from django.db.models import Count
+        from utils.synthetic_data import LibrarySeeder
+
+        result = LibrarySeeder(users=2, tags=50, seed=1, batch_size=100).run(300)
+
+        self.assertEqual(result, {"users": 2, "items": 300})
+        self.assertEqual(Item.objects.filter(link__isnull=True, file_group__isnull=True).count(), 0)
+        self.assertFalse(Item.objects.filter(type="link", link__media_urls__isnull=True).exists())
+        counts = dict(Tag.objects.annotate(n=Count("items")).values_list("name", "n"))
+        self.assertGreater(counts["tag-0"], counts.get("tag-49", 0))
+
+
+class OwnerScopeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice", "alice@example.com", "password")
+        cls.bob = User.objects.create_user("bob", "bob@example.com", "password")
+        cls.staff = User.objects.create_user("staff", "staff@example.com", "password", is_staff=True)
+        cls.alice_items = [Item.objects.create(owner=cls.alice, name=f"a{i}", type="link") for i in range(3)]
+        cls.bob_item = Item.objects.create(owner=cls.bob, name="b", type="link")
+        tags = get_or_create_tags(["shared", "bob-only"])
+        for item in cls.alice_items:
+            item.tags.add(tags["shared"])
+        cls.bob_item.tags.add(tags["shared"], tags["bob-only"])
+
+    def get(self, user, url):
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_users_only_see_their_own_items(self):
+        ids = {row["id"] for row in self.get(self.alice, "/api/items/?limit=0")}
+        self.assertEqual(ids, {item.id for item in self.alice_items})
+        self.assertEqual(len(self.get(self.staff, "/api/items/?limit=0")), 4)
+        self.assertEqual(len(self.get(self.alice, f"/api/items/?limit=0&owner={self.bob.pk}")), 3)
+        self.assertEqual([row["id"] for row in self.get(self.staff, f"/api/items/?limit=0&owner={self.bob.pk}")], [self.bob_item.id])
+
+    def test_search_matches_name_url_or_tag_within_owner(self):
+        Link.objects.create(item=self.alice_items[0], url="https://twitter.com/someone/status/42")
+        Link.objects.create(item=self.bob_item, url="https://twitter.com/someone/status/43")
+
+        def search(user, q):
+            return {row["name"] for row in self.get(user, f"/api/items/?limit=0&q={q}")}
+
+        self.assertEqual(search(self.alice, "A1"), {"a1"})
+        self.assertEqual(search(self.alice, "someone"), {"a0"})
+        self.assertEqual(search(self.staff, "someone"), {"a0", "b"})
+        self.assertEqual(search(self.staff, "bob-on"), {"b"})
+        self.assertEqual(search(self.staff, "someone bob-on"), {"b"})
+
+    def test_neighbors_stay_within_owner(self):
+        newest, middle, oldest = sorted(self.alice_items, key=lambda i: (i.created_at, i.id), reverse=True)
+        data = self.get(self.alice, f"/api/items/{oldest.id}/neighbors/")
+        self.assertEqual(data, {"prev_id": middle.id, "next_id": None})
+
+    def test_tag_counts_are_per_owner(self):
+        def counts(user, prefix):
+            return [(row["name"], row["item_count"]) for row in self.get(user, f"/api/tags/autocomplete/?q={prefix}")]
+
+        self.assertEqual(counts(self.alice, "s"), [("shared", 3)])
+        self.assertEqual(counts(self.alice, "b"), [("bob-only", 0)])
+        self.assertEqual(counts(self.staff, "s"), [("shared", 4)])
+        self.assertEqual(counts(self.staff, "b"), [("bob-only", 1)])
+
+        facets = self.get(self.bob, "/api/tags/facets/?tag_names=shared")
+        self.assertEqual([(row["name"], row["item_count"]) for row in facets], [("bob-only", 1)])
+        self.assertEqual(self.get(self.alice, "/api/tags/facets/?tag_names=shared"), [])
+
+    def test_users_can_see_tags_they_have_not_used(self):
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        response = client.post("/api/tags/", {"name": "fresh"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(client.get(f"/api/tags/{response.data['id']}/").status_code, 200)
+        self.assertIn("fresh", {row["name"] for row in client.get("/api/tags/", {"limit": 0}).data})
+
+    def test_only_staff_can_rewrite_shared_tags(self):
+        from rest_framework.test import APIClient
+
+        shared = Tag.objects.get(name="shared")
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        self.assertEqual(client.post(f"/api/tags/{shared.pk}/rename/", {"name": "mine"}, format="json").status_code, 403)
+        self.assertEqual(client.delete(f"/api/tags/{shared.pk}/").status_code, 403)
+        self.assertEqual(set(self.bob_item.tags.values_list("name", flat=True)), {"shared", "bob-only"})
+
+        client.force_authenticate(self.staff)
+        self.assertEqual(client.post(f"/api/tags/{shared.pk}/rename/", {"name": "common"}, format="json").status_code, 200)
+
+    def test_merge_deletes_only_the_source_tag(self):
+        from rest_framework.test import APIClient
+
+        Tag.objects.create(name="unused-manual")
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        bob_only = Tag.objects.get(name="bob-only")
+        response = client.post(f"/api/tags/{bob_only.pk}/rename/", {"name": "shared"}, format="json")
+        self.assertEqual(response.data["merged"], {"moved": 0, "duplicates": 1})
+        self.assertEqual(set(Tag.objects.values_list("name", flat=True)), {"shared", "unused-manual"})
+
+        self.assertEqual(client.post("/api/tags/purge-orphans/").data, {"purged": 1})
+        self.assertEqual(set(Tag.objects.values_list("name", flat=True)), {"shared"})
+
+    def test_merge_endpoint_moves_items_and_drops_duplicates(self):
+        from rest_framework.test import APIClient
+
+        extra = get_or_create_tags(["extra"])["extra"]
+        for item in (*self.alice_items[:2], self.bob_item):
+            item.tags.add(extra)
+        bob_only = Tag.objects.get(name="bob-only")
+
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        self.assertEqual(client.post(f"/api/tags/{extra.pk}/merge/", {"into": bob_only.pk}, format="json").status_code, 403)
+
+        client.force_authenticate(self.staff)
+        self.assertEqual(client.post(f"/api/tags/{extra.pk}/merge/", {"into": extra.pk}, format="json").status_code, 400)
+        response = client.post(f"/api/tags/{extra.pk}/merge/", {"into": bob_only.pk}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["moved"], response.data["duplicates"]), (2, 1))
+        self.assertEqual(response.data["tag"]["name"], "bob-only")
+        self.assertFalse(Tag.objects.filter(pk=extra.pk).exists())
+        self.assertEqual(
+            set(Item.objects.filter(tags=bob_only).values_list("id", flat=True)),
+            {item.id for item in (*self.alice_items[:2], self.bob_item)},
+        )
+
+    def test_rename_onto_a_name_taken_meanwhile_merges(self):
+        from unittest import mock
+        from utils.tag_service import rename_tag
+
+        bob_only = Tag.objects.get(name="bob-only")
+        # The lookup misses the clashing tag, as if it was created after it ran
+        lookups = [Tag.objects.none(), Tag.objects.select_for_update()]
+        with mock.patch.object(Tag.objects, "select_for_update", side_effect=lookups):
+            tag, merged = rename_tag(bob_only, "shared")
+        self.assertEqual(tag.name, "shared")
+        self.assertEqual(merged, {"moved": 0, "duplicates": 1})
+        self.assertFalse(Tag.objects.filter(pk=bob_only.pk).exists())
+
+    def test_deleting_a_user_removes_their_library(self):
+        from items.models import Tombstone
+
+        Link.objects.create(item=self.bob_item, url="https://twitter.com/bob/status/1")
+        self.bob.delete()
+
+        self.assertFalse(Item.objects.filter(owner_id=self.bob.pk).exists())
+        self.assertFalse(Tombstone.objects.filter(owner_id=self.bob.pk).exists())
+        self.assertEqual(Item.objects.count(), 3)
+
+        self.alice_items[0].delete()
+        self.assertTrue(Tombstone.objects.filter(owner=self.alice, model="item").exists())
+
+
+class LibraryImporterTests(TestCase):
+    def test_bad_rows_are_reported_and_the_rest_imported(self):
+        import orjson
+        from utils.library_transfer import LibraryImporter
+        from utils.tag_service import tags_for_url
+
+        owner = User.objects.create_user("importer", "importer@example.com", "password")
+        rows = [
+            {"name": "ok", "type": "link", "tags": ["x"], "link": {"url": "https://twitter.com/a/status/1"}},
+            {"name": "bad media", "type": "link", "link": {"url": "https://twitter.com/a/status/2", "media_urls": "oops"}},
+            {"name": "bad media entry", "type": "link", "link": {"url": "https://twitter.com/a/status/3", "media_urls": ["x"]}},
+            {"name": "bad tags", "type": "link", "tags": "x"},
+            {"name": "bad files", "type": "file_group", "file_group": {"files": [1]}},
+            {"name": "bad date", "type": "link", "created_at": "not a date"},
+            {"name": "ok too", "type": "file_group", "file_group": {"files": [{"file_name": "a.jpg"}]}},
+        ]
+        lines = [orjson.dumps(row) for row in rows]
+
+        result = LibraryImporter(owner=owner, batch_size=2).run(lines)
+
+        self.assertEqual(result["created"], 2)
+        self.assertEqual([error["line"] for error in result["errors"]], [2, 3, 4, 5, 6])
+        items = Item.objects.filter(owner=owner)
+        self.assertEqual(set(items.values_list("name", flat=True)), {"ok", "ok too"})
+        self.assertEqual(set(items.get(name="ok").tags.values_list("name", flat=True)), {"x", *tags_for_url("https://twitter.com/a/status/1")})
+        self.assertIn("src-file", items.get(name="ok too").tags.values_list("name", flat=True))
+        # Cards are built on first read, not inside the import request
+        self.assertEqual(items.filter(card__isnull=True).count(), 2)
+
+
+@override_settings(SYNC_SAFETY_LAG_SECONDS=0)
+class SyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("syncer", "syncer@example.com", "password")
+        cls.items = [Item.objects.create(owner=cls.user, name=f"s{i}", type="link") for i in range(5)]
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sync(self, since=None, limit=2):
+        params = {"limit": limit, **({"since": since} if since else {})}
+        return self.client.get("/api/sync/", params)
+
+    def test_cursor_pages_through_changes_and_deletions(self):
+        seen, cursor = [], None
+        while True:
+            data = self.sync(cursor).data
+            seen += [row["id"] for row in data["items"]]
+            cursor = data["next_cursor"]
+            if not data["has_more"]:
+                break
+        self.assertEqual(seen, [item.id for item in self.items])
+
+        deleted_id = self.items[0].id
+        self.items[0].delete()
+        self.items[1].name = "renamed"
+        self.items[1].save()
+        data = self.sync(cursor, limit=10).data
+        self.assertEqual([row["id"] for row in data["items"]], [self.items[1].id])
+        self.assertEqual([(row["model"], row["object_id"]) for row in data["deleted"]], [("item", deleted_id)])
+        self.assertEqual(self.sync(data["next_cursor"]).data["items"], [])
+
+    def test_recent_changes_wait_for_the_safety_lag(self):
+        with override_settings(SYNC_SAFETY_LAG_SECONDS=3600):
+            self.assertEqual(self.sync().data["items"], [])
+
+    def test_old_cursors_expire_and_tombstones_are_pruned(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from items.models import Tombstone
+        from utils.sync_service import encode_cursor, prune_tombstones
+
+        self.items[0].delete()
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=100))
+        self.assertEqual(prune_tombstones(days=90), 1)
+
+        stale = encode_cursor({}, timezone.now() - timedelta(days=91))
+        self.assertEqual(self.sync(stale).status_code, 410)
+        self.assertEqual(self.sync("garbage").status_code, 400)
+
+
+class BulkTagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice", "alice@example.com", "password")
+        cls.bob = User.objects.create_user("bob", "bob@example.com", "password")
+        cls.alice_items = [Item.objects.create(owner=cls.alice, name=f"a{i}", type="link") for i in range(4)]
+        cls.bob_item = Item.objects.create(owner=cls.bob, name="b", type="link")
+        shared = get_or_create_tags(["shared"])["shared"]
+        for item in [*cls.alice_items[:3], cls.bob_item]:
+            item.tags.add(shared)
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def bulk(self, **data):
+        response = self.client.post("/api/items/bulk-tags/", data, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def tag_count(self, name):
+        return Tag.objects.get(name=name).items.count()
+
+    def test_add_by_ids_ignores_other_owners_and_is_idempotent(self):
+        ids = [self.alice_items[0].id, self.alice_items[1].id, self.bob_item.id]
+        self.assertEqual(self.bulk(ids=ids, add=["new"]), {"matched": 2, "added": 2, "removed": 0})
+        self.assertEqual(self.bulk(ids=ids, add=["new"]), {"matched": 2, "added": 0, "removed": 0})
+        self.assertEqual(self.tag_count("new"), 2)
+        self.assertFalse(self.bob_item.tags.filter(name="new").exists())
+
+    def test_tag_filter_mode_stays_within_owner(self):
+        result = self.bulk(tag_names="shared", add=["moved"], remove=["shared"])
+        self.assertEqual(result, {"matched": 3, "added": 3, "removed": 3})
+        self.assertEqual(self.tag_count("moved"), 3)
+        self.assertEqual(list(Tag.objects.get(name="shared").items.all()), [self.bob_item])
+
+    def test_touches_updated_at_and_invalidates_cards(self):
+        from utils.card_service import refresh_item_cards
+
+        item = self.alice_items[0]
+        refresh_item_cards(Item.objects.filter(pk=item.pk))
+        before = Item.objects.get(pk=item.pk)
+        self.assertIsNotNone(before.card)
+
+        self.bulk(ids=[item.id], add=["fresh"])
+        after = Item.objects.get(pk=item.pk)
+        self.assertIsNone(after.card)
+        self.assertGreater(after.updated_at, before.updated_at)
+
+    def test_query_count_does_not_grow_with_selection(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        counts = []
+        for ids, name in (([self.alice_items[0].id], "one"), ([item.id for item in self.alice_items], "many")):
+            with CaptureQueriesContext(connection) as queries:
+                self.bulk(ids=ids, add=[f"add-{name}"], remove=["shared"])
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        with self.assertNumQueries(counts[0]):
+            self.bulk(tag_names="add-many", add=["again"], remove=["add-many"])
+
+
+class ItemListQueryTests(TestCase):
+    """
+    A list page costs a fixed number of queries whatever its size.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        from items.models import FileGroup, File, MediaURL
+
+        cls.user = User.objects.create_user("reader", "reader@example.com", "password")
+        tags = list(get_or_create_tags(["one", "two", "three"]).values())
+        for i in range(6):
+            item = Item.objects.create(owner=cls.user, name=f"item-{i}", type="link")
+            item.tags.set(tags[: i % 3 + 1])
+            link = Link.objects.create(item=item, url=f"https://example.com/{i}")
+            MediaURL.objects.create(link=link, url=f"https://cdn.example.com/{i}.mp4")
+            MediaURL.objects.create(link=link, url=f"https://cdn.example.com/{i}.jpg", media_type="image")
+            group = FileGroup.objects.create(item=item)
+            File.objects.create(file_group=group, file_name=f"{i}.txt")
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertListQueries(self, num, params):
+        for limit in (2, 5):
+            with self.assertNumQueries(num):
+                response = self.client.get("/api/items/", {**params, "limit": limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data["results"]), limit)
+        return response.data["results"]
+
+    def test_plain_list(self):
+        rows = self.assertListQueries(3, {})
+        self.assertTrue(all(row["tags"] for row in rows))
+
+    def test_expanded_list(self):
+        rows = self.assertListQueries(5, {"expand": "link.media_urls,file_group.files"})
+        self.assertTrue(all(len(row["link"]["media_urls"]) == 2 for row in rows))
+        self.assertTrue(all(len(row["file_group"]["files"]) == 1 for row in rows))
+
+    def test_sparse_fields(self):
+        rows = self.assertListQueries(2, {"fields": "id,name"})
+        self.assertEqual(set(rows[0]), {"id", "name"})
+
+    def test_card_mode_builds_missing_cards_once(self):
+        from utils.card_service import refresh_item_cards
+
+        Item.objects.update(card=None)
+        with self.assertNumQueries(9):
+            response = self.client.get("/api/items/", {"mode": "card", "limit": 5})
+        cards = response.data["results"]
+        self.assertEqual(len(cards), 5)
+        self.assertTrue(all(card["tags"] and card["link"]["media_urls"] for card in cards))
+        self.assertEqual(Item.objects.filter(card__isnull=True).count(), 1)
+
+        refresh_item_cards(Item.objects.all())
+        self.assertListQueries(2, {"mode": "card"})
+        self.assertEqual(self.client.get("/api/items/", {"mode": "card", "limit": 5}).data["results"], cards)
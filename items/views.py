@@ -2,18 +2,22 @@ import uuid
 import os
 import mimetypes
 from rest_framework import viewsets, filters, status
+from rest_framework.views import APIView
 from rest_framework.utils.urls import replace_query_param
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny, SAFE_METHODS
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet, filters as df_filters
-from drf_yasg.utils import swagger_auto_schema
+from drf_yasg.utils import swagger_auto_schema, no_body
 from drf_yasg import openapi
 from django.conf import settings
-from django.db.models import Count
+from django.core.cache import cache
+from django.db.models import Count, Q
 from django.utils.encoding import smart_str
-from django.http import FileResponse, Http404
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.utils import timezone
 from urllib.parse import urlparse, urlunparse
 from .models.item import Item
 from .models.tag import Tag
@@ -23,15 +27,53 @@ from .models.file_group import FileGroup
 from .models.file import File
 from .serializers import (
     ItemSerializer, TagSerializer, LinkSerializer,
-    FileGroupSerializer, FileSerializer, MediaURLSerializer
+    FileGroupSerializer, FileSerializer, MediaURLSerializer,
+    BulkTagSerializer, TagMergeSerializer, TagRenameSerializer,
 )
 from utils.g_drive import upload_to_drive_oauth
-from utils.tag_service import auto_tag_item_from_src
+from utils.tag_service import auto_tag_item_from_src, bulk_update_item_tags, merge_tags, rename_tag, purge_orphan_tags
+from utils.card_service import refresh_item_cards
+from utils.library_transfer import export_queryset, export_ndjson, LibraryImporter
+from utils.sync_service import changes_since, collection_version, InvalidCursor, CursorExpired, DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE
 
 IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
 
 PREFILTER_TAGS = []
 
+AUTOCOMPLETE_LIMIT = 20
+AUTOCOMPLETE_MAX_LIMIT = 100
+
+FACETS_LIMIT = 50
+FACETS_MAX_LIMIT = 500
+FACETS_CACHE_SECONDS = 300
+
+def get_item_base_queryset(owner_id=None):
+    """
+    Items visible to the item endpoints, before any request filters.
+    Scoped to one owner's items when `owner_id` is given (see get_owner_scope()).
+    """
+    queryset = Item.objects.all()
+    if owner_id is not None:
+        queryset = queryset.filter(owner_id=owner_id)
+    if PREFILTER_TAGS:
+        queryset = queryset.filter(tags__name__in=PREFILTER_TAGS).distinct()
+    return queryset
+
+def get_owner_scope(request):
+    """
+    Owner whose items a request works on: always the user themselves for
+    non-staff users; for staff the ?owner= user id, or everyone when omitted.
+    """
+    if not request.user.is_staff:
+        return request.user.pk
+    owner = request.query_params.get("owner")
+    if not owner:
+        return None
+    try:
+        return uuid.UUID(owner)
+    except ValueError:
+        raise ValidationError({"owner": "Must be a user id."})
+
 def force_port(url: str, port: int = 8000) -> str:
     parsed = urlparse(url)
     netloc = f"{parsed.hostname}:{port}"
@@ -76,6 +118,7 @@ class ItemPagination(PageNumberPagination):
 
 class ItemFilter(FilterSet):
     tag_names = df_filters.CharFilter(method="filter_tag_names")
+    q = df_filters.CharFilter(method="filter_search")
 
     def filter_tag_names(self, queryset, name, value):
         names = [n.strip() for n in value.split(",") if n.strip()]
@@ -83,6 +126,21 @@ class ItemFilter(FilterSet):
             queryset = queryset.filter(tags__name=tag)
         return queryset.distinct()
 
+    def filter_search(self, queryset, name, value):
+        """
+        Every whitespace-separated term must match the item name, one of its
+        tag names or its link URL (case-insensitive substring). Each source
+        is a separate id subquery joined with UNION, so on Postgres every
+        branch is served by its own trigram index from migration 0011 (an OR
+        across the item/link join would force a sequential scan).
+        """
+        for term in value.split():
+            by_name = Item.objects.filter(name__icontains=term).values("id")
+            by_url = Link.objects.filter(url__icontains=term).values("item_id")
+            by_tag = Item.tags.through.objects.filter(tag__name__icontains=term).values("item_id")
+            queryset = queryset.filter(id__in=by_name.union(by_url, by_tag))
+        return queryset
+
     class Meta:
         model = Item
         fields = []
@@ -96,12 +154,41 @@ class ItemViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_class = ItemFilter
     ordering_fields = ["created_at", "name"]
-    ordering = ["-created_at"]
+    ordering = ["-created_at", "-id"]
 
     def get_queryset(self):
-        if PREFILTER_TAGS:
-            return Item.objects.filter(tags__name__in=PREFILTER_TAGS).distinct()
-        return Item.objects.all()
+        queryset = get_item_base_queryset(get_owner_scope(self.request))
+
+        if self.is_card_mode():
+            # Cards are denormalized, so the list reads a single column
+            queryset = queryset.only("id", "card")
+        elif self.action in ("list", "retrieve"):
+            queryset = ItemSerializer.setup_eager_loading(
+                queryset,
+                fields=self.get_csv_param("fields"),
+                expand=self.get_csv_param("expand"),
+            )
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # Sparse fieldsets and expansions only apply to reads
+        if self.request and self.request.method in SAFE_METHODS:
+            context["fields"] = self.get_csv_param("fields")
+            context["expand"] = self.get_csv_param("expand")
+        return context
+
+    def is_card_mode(self):
+        return (
+            self.action == "list"
+            and self.request.query_params.get("mode") == "card"
+        )
+
+    def get_csv_param(self, name):
+        value = self.request.query_params.get(name) if self.request else None
+        if not value:
+            return None
+        return [n.strip() for n in value.split(",") if n.strip()]
 
     def perform_create(self, serializer):
         # normal users always get themselves as owner
@@ -125,11 +212,65 @@ class ItemViewSet(viewsets.ModelViewSet):
                 description="Comma-separated list of tag names to filter items",
                 type=openapi.TYPE_STRING,
             ),
+            openapi.Parameter(
+                "owner",
+                openapi.IN_QUERY,
+                description="Staff only: user id whose items to return (default: all users). Other users always get their own items.",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "q",
+                openapi.IN_QUERY,
+                description="Search terms matched against item name, tag names and link URL",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "fields",
+                openapi.IN_QUERY,
+                description="Comma-separated list of fields to return, e.g. 'id,name,tags'",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "expand",
+                openapi.IN_QUERY,
+                description="Comma-separated relations to embed: link, link.media_urls, file_group, file_group.files",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "mode",
+                openapi.IN_QUERY,
+                description="'card' returns the precomputed item cards (item, tags, link, media URLs, file group, files)",
+                type=openapi.TYPE_STRING,
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
+        if self.is_card_mode():
+            return self.list_cards()
         return super().list(request, *args, **kwargs)
 
+    def list_cards(self):
+        """
+        Returns the stored item cards, building any that are missing or invalidated.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = self.paginate_queryset(queryset)
+        items = list(page if page is not None else queryset)
+
+        missing = [item.id for item in items if item.card is None]
+        if missing:
+            refresh_item_cards(Item.objects.filter(id__in=missing))
+            cards = dict(Item.objects.filter(id__in=missing).values_list("id", "card"))
+            for item in items:
+                if item.card is None:
+                    item.card = cards.get(item.id)
+
+        data = [item.card for item in items]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter(
@@ -138,6 +279,18 @@ class ItemViewSet(viewsets.ModelViewSet):
                 description="Comma-separated list of tag names to filter items",
                 type=openapi.TYPE_STRING,
             ),
+            openapi.Parameter(
+                "owner",
+                openapi.IN_QUERY,
+                description="Staff only: user id whose items to return (default: all users). Other users always get their own items.",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "q",
+                openapi.IN_QUERY,
+                description="Search terms matched against item name, tag names and link URL",
+                type=openapi.TYPE_STRING,
+            ),
             openapi.Parameter(
                 "ordering",
                 openapi.IN_QUERY,
@@ -178,33 +331,252 @@ class ItemViewSet(viewsets.ModelViewSet):
 
         return Response({"prev_id": prev_id, "next_id": next_id})
 
+    @swagger_auto_schema(
+        request_body=BulkTagSerializer,
+        responses={
+            200: openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    "matched": openapi.Schema(type=openapi.TYPE_INTEGER, description="Items selected"),
+                    "added": openapi.Schema(type=openapi.TYPE_INTEGER, description="Tag assignments added"),
+                    "removed": openapi.Schema(type=openapi.TYPE_INTEGER, description="Tag assignments removed"),
+                },
+            )
+        },
+    )
+    @action(detail=False, methods=["post"], url_path="bulk-tags")
+    def bulk_tags(self, request):
+        """
+        Add/remove tags on many items at once, selected by ids or by a tag filter.
+        """
+        serializer = BulkTagSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        queryset = self.get_queryset()
+        if "ids" in data:
+            queryset = queryset.filter(id__in=data["ids"])
+        else:
+            queryset = ItemFilter(data={"tag_names": data["tag_names"]}, queryset=queryset).qs
+
+        result = bulk_update_item_tags(queryset, add=data["add"], remove=data["remove"])
+        return Response(result)
+
 class TagViewSet(viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [IsAuthenticated]
+    # Tags are shared by every owner's items, so rewriting one is staff-only
+    staff_actions = {"update", "partial_update", "destroy", "merge", "rename", "purge_orphans"}
+
+    def get_permissions(self):
+        if self.action in self.staff_actions:
+            return [IsAdminUser()]
+        return super().get_permissions()
 
     def get_queryset(self):
         queryset = Tag.objects.all()
 
         if PREFILTER_TAGS:
-            # Get the IDs of all Items that match the premature tags
-            premature_item_ids = Item.objects.filter(
-                tags__name__in=PREFILTER_TAGS
-            ).values_list('id', flat=True)
-
-            # Filter the Tags to only those associated with those Items
-            queryset = queryset.filter(
-                items__id__in=premature_item_ids
-            ).distinct()
-
-        # Annotate the queryset with the count of associated items
-        queryset = queryset.annotate(
-            item_count=Count('items')
-        )
+            # Only tags on the prefiltered items, counting those items only
+            # (filtering before annotate() makes the count share the join)
+            item_ids = get_item_base_queryset().order_by().values('id')
+            queryset = queryset.filter(items__in=item_ids)
+
+        # Annotate the queryset with the count of associated items. Every tag
+        # stays visible; owner scoping only decides which items are counted.
+        owner_id = get_owner_scope(self.request)
+        if owner_id is not None:
+            item_count = Count('items', filter=Q(items__owner_id=owner_id))
+        else:
+            item_count = Count('items')
+        queryset = queryset.annotate(item_count=item_count)
 
         # Order the results by the calculated count in descending order
         return queryset.order_by('-item_count', 'name')
 
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "q",
+                openapi.IN_QUERY,
+                description="Tag name prefix (case-sensitive), e.g. 'sub'",
+                type=openapi.TYPE_STRING,
+                required=True,
+            ),
+            openapi.Parameter(
+                "limit",
+                openapi.IN_QUERY,
+                description=f"Maximum number of suggestions (default {AUTOCOMPLETE_LIMIT}, max {AUTOCOMPLETE_MAX_LIMIT})",
+                type=openapi.TYPE_INTEGER,
+            ),
+        ],
+        responses={
+            200: openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "name": openapi.Schema(type=openapi.TYPE_STRING),
+                        "item_count": openapi.Schema(type=openapi.TYPE_INTEGER),
+                    },
+                ),
+            )
+        },
+    )
+    @action(detail=False, methods=["get"], url_path="autocomplete")
+    def autocomplete(self, request):
+        """
+        Tags starting with ?q=, ranked by item count. On Postgres the prefix
+        match uses the varchar_pattern_ops (_like) index Django creates
+        alongside the unique index on Tag.name.
+        """
+        prefix = request.query_params.get("q", "")
+        if not prefix:
+            return Response([])
+
+        try:
+            limit = int(request.query_params.get("limit", AUTOCOMPLETE_LIMIT))
+        except (TypeError, ValueError):
+            limit = AUTOCOMPLETE_LIMIT
+        limit = max(1, min(limit, AUTOCOMPLETE_MAX_LIMIT))
+
+        queryset = self.get_queryset().filter(name__startswith=prefix)
+        return Response(list(queryset.values("id", "name", "item_count")[:limit]))
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "tag_names",
+                openapi.IN_QUERY,
+                description="Comma-separated list of tag names, as for /api/items/?tag_names=",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "limit",
+                openapi.IN_QUERY,
+                description=f"Number of co-occurring tags to return (default {FACETS_LIMIT}, max {FACETS_MAX_LIMIT})",
+                type=openapi.TYPE_INTEGER,
+            ),
+        ],
+        responses={
+            200: openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "name": openapi.Schema(type=openapi.TYPE_STRING),
+                        "item_count": openapi.Schema(type=openapi.TYPE_INTEGER, description="Matching items carrying this tag"),
+                    },
+                ),
+            )
+        },
+    )
+    @action(detail=False, methods=["get"], url_path="facets")
+    def facets(self, request):
+        """
+        Counts of the other tags carried by the items matching ?tag_names=,
+        from one aggregate query over the item-tag table. Cached per filter
+        and collection version.
+        """
+        tag_names = sorted({n.strip() for n in request.query_params.get("tag_names", "").split(",") if n.strip()})
+        try:
+            limit = int(request.query_params.get("limit", FACETS_LIMIT))
+        except (TypeError, ValueError):
+            limit = FACETS_LIMIT
+        limit = max(1, min(limit, FACETS_MAX_LIMIT))
+
+        owner_id = get_owner_scope(request)
+        cache_key = "tag-facets:{}:{}:{}:{}:{}".format(
+            collection_version(), owner_id or "all", ",".join(sorted(PREFILTER_TAGS)), ",".join(tag_names), limit,
+        )
+        facets = cache.get(cache_key)
+        if facets is None:
+            items = ItemFilter(data={"tag_names": ",".join(tag_names)}, queryset=get_item_base_queryset(owner_id)).qs
+            rows = (
+                Item.tags.through.objects
+                .filter(item_id__in=items.order_by().values("id"))
+                .exclude(tag__name__in=tag_names)
+                .values("tag_id", "tag__name")
+                .annotate(item_count=Count("item_id"))
+                .order_by("-item_count", "tag__name")[:limit]
+            )
+            facets = [
+                {"id": row["tag_id"], "name": row["tag__name"], "item_count": row["item_count"]}
+                for row in rows
+            ]
+            cache.set(cache_key, facets, FACETS_CACHE_SECONDS)
+
+        return Response(facets)
+
+    @swagger_auto_schema(
+        request_body=TagMergeSerializer,
+        responses={
+            200: openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    "tag": openapi.Schema(type=openapi.TYPE_OBJECT, description="The tag merged into"),
+                    "moved": openapi.Schema(type=openapi.TYPE_INTEGER, description="Items moved onto the target tag"),
+                    "duplicates": openapi.Schema(type=openapi.TYPE_INTEGER, description="Items that already had the target tag"),
+                },
+            )
+        },
+    )
+    @action(detail=True, methods=["post"], url_path="merge")
+    def merge(self, request, pk=None):
+        """
+        Merge this tag into another one (e.g. 'subreddit-Foo' into 'subreddit-foo').
+        """
+        source = self.get_object()
+        serializer = TagMergeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        target = serializer.validated_data["into"]
+
+        if target.pk == source.pk:
+            return Response({"error": "A tag can't be merged into itself"}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = merge_tags(source, target)
+        return Response({"tag": TagSerializer(target).data, **result})
+
+    @swagger_auto_schema(
+        request_body=TagRenameSerializer,
+        responses={200: TagSerializer},
+    )
+    @action(detail=True, methods=["post"], url_path="rename")
+    def rename(self, request, pk=None):
+        """
+        Rename this tag. Renaming to an existing tag's name merges the two.
+        """
+        tag = self.get_object()
+        serializer = TagRenameSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        tag, merged = rename_tag(tag, serializer.validated_data["name"])
+        data = TagSerializer(tag).data
+        if merged is not None:
+            data["merged"] = merged
+        return Response(data)
+
+    @swagger_auto_schema(
+        request_body=no_body,
+        responses={
+            200: openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    "purged": openapi.Schema(type=openapi.TYPE_INTEGER, description="Tags without items deleted"),
+                },
+            )
+        },
+    )
+    @action(detail=False, methods=["post"], url_path="purge-orphans")
+    def purge_orphans(self, request):
+        """
+        Delete every tag that isn't attached to any item. Staff only.
+        """
+        return Response({"purged": purge_orphan_tags()})
+
 class LinkViewSet(viewsets.ModelViewSet):
     queryset = Link.objects.prefetch_related('media_urls').all()
     serializer_class = LinkSerializer
@@ -360,3 +732,96 @@ class FileViewSet(viewsets.ModelViewSet):
         response['Accept-Ranges'] = 'bytes'
 
         return response
+
+class LibraryExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Streams the library as NDJSON: one item per line with its "
+                              "tags, link, media URLs, file group and files. Users get their own "
+                              "items; staff get everyone's, or one user's with ?owner=.",
+        responses={200: openapi.Response(description="application/x-ndjson stream")},
+    )
+    def get(self, request):
+        queryset = export_queryset()
+        owner_id = get_owner_scope(request)
+        if owner_id is not None:
+            queryset = queryset.filter(owner_id=owner_id)
+        response = StreamingHttpResponse(export_ndjson(queryset), content_type="application/x-ndjson")
+        filename = f"library-{timezone.now():%Y%m%d-%H%M%S}.ndjson"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class LibraryImportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Imports an NDJSON export for the current user. The body is "
+                              "streamed and written in batches; items whose link URL already "
+                              "exists are skipped. Auto source tags are applied while writing; "
+                              "item cards are built on first read. The request needs a "
+                              "Content-Length: chunked uploads without one are rejected with 400.",
+        request_body=openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_BINARY),
+        responses={200: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "created": openapi.Schema(type=openapi.TYPE_INTEGER),
+                "skipped": openapi.Schema(type=openapi.TYPE_INTEGER),
+                "errors": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+            },
+        )},
+    )
+    def post(self, request):
+        # Read the raw body line by line instead of parsing it all into request.data.
+        # DRF leaves request.stream as None without a Content-Length (e.g. a
+        # chunked upload), so those get the 400 below.
+        if request.stream is None:
+            return Response({"error": "An NDJSON request body is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = LibraryImporter(owner=request.user).run(request.stream)
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class SyncView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "since",
+                openapi.IN_QUERY,
+                description="Cursor returned by the previous call. Omit for a full initial sync.",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "limit",
+                openapi.IN_QUERY,
+                description=f"Maximum rows per model (default {DEFAULT_BATCH_SIZE}, max {MAX_BATCH_SIZE})",
+                type=openapi.TYPE_INTEGER,
+            ),
+            openapi.Parameter(
+                "owner",
+                openapi.IN_QUERY,
+                description="Staff only: user id whose rows to sync (default: all users). Other users always sync their own.",
+                type=openapi.TYPE_STRING,
+            ),
+        ],
+        operation_description="Returns items, links, media URLs, file groups, files and deletions "
+                              "changed since the cursor. Keep calling with next_cursor while has_more is true. "
+                              "A cursor older than the tombstone retention window gets 410: start over without one.",
+    )
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", DEFAULT_BATCH_SIZE))
+        except (TypeError, ValueError):
+            limit = DEFAULT_BATCH_SIZE
+        limit = max(1, min(limit, MAX_BATCH_SIZE))
+
+        try:
+            data = changes_since(request.query_params.get("since"), limit=limit, owner_id=get_owner_scope(request))
+        except CursorExpired as e:
+            return Response({"error": str(e)}, status=status.HTTP_410_GONE)
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
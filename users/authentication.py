@@ -0,0 +1,110 @@
+import time
+import uuid
+from django.conf import settings
+from django.core import signing
+from django.db.models import F
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+from .models import User
+
+TOKEN_SALT = "users.authentication.SignedTokenAuthentication"
+
+# Fields a token-authenticated user is built from (in model order, as from_db
+# expects); the rest load on first access
+TOKEN_USER_FIELDS = [
+    f.attname for f in User._meta.concrete_fields
+    if f.attname in ("id", "is_staff", "deleted_at", "token_version")
+]
+
+# user id -> (checked_at, token_version, is_active, is_staff), shared by the threads of a worker
+_token_versions = {}
+MAX_CACHED_VERSIONS = 10000
+
+
+def issue_token(user):
+    """
+    Returns a signed, timestamped bearer token for `user`, valid for
+    API_TOKEN_MAX_AGE seconds or until revoke_tokens(user).
+    """
+    claims = {
+        "uid": str(user.pk),
+        "staff": user.is_staff,
+        "active": user.is_active,
+        "ver": user.token_version,
+    }
+    return signing.dumps(claims, salt=TOKEN_SALT)
+
+
+def revoke_tokens(user):
+    """
+    Invalidates every token issued to `user` so far. Other workers notice
+    within API_TOKEN_CACHE_SECONDS.
+    """
+    User.objects.filter(pk=user.pk).update(token_version=F("token_version") + 1)
+    _token_versions.pop(user.pk, None)
+    user.refresh_from_db(fields=["token_version"])
+
+
+def current_token_version(user_id):
+    """
+    (token_version, is_active, is_staff) of the user, read at most once
+    every API_TOKEN_CACHE_SECONDS per worker. None if the user doesn't exist.
+    """
+    now = time.monotonic()
+    cached = _token_versions.get(user_id)
+    if cached is not None and now - cached[0] < settings.API_TOKEN_CACHE_SECONDS:
+        return cached[1:]
+
+    row = User.objects.filter(pk=user_id).values_list("token_version", "deleted_at", "is_staff").first()
+    if row is None:
+        return None
+    current = (row[0], row[1] is None, row[2])
+    if settings.API_TOKEN_CACHE_SECONDS:
+        if len(_token_versions) >= MAX_CACHED_VERSIONS:
+            _token_versions.clear()
+        _token_versions[user_id] = (now, *current)
+    return current
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    `Authorization: Bearer <token>` with a token from issue_token().
+    The signature and expiry are checked without touching the database, so
+    a request costs no session or full user lookup. Only the user's token
+    version, active flag and is_staff are read, cached per worker for
+    API_TOKEN_CACHE_SECONDS (0 reads them on every request); is_staff comes
+    from there rather than the claim, so a demotion applies within that
+    window instead of when the token expires.
+    """
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed("Invalid token header.")
+
+        try:
+            claims = signing.loads(auth[1].decode(), salt=TOKEN_SALT, max_age=settings.API_TOKEN_MAX_AGE)
+            user_id = uuid.UUID(claims["uid"])
+        except signing.SignatureExpired:
+            raise AuthenticationFailed("Token has expired.")
+        except (signing.BadSignature, UnicodeDecodeError, KeyError, TypeError, ValueError):
+            raise AuthenticationFailed("Invalid token.")
+
+        if not claims.get("active"):
+            raise AuthenticationFailed("User inactive or deleted.")
+        current = current_token_version(user_id)
+        if current is None or current[0] != claims.get("ver"):
+            raise AuthenticationFailed("Token has been revoked.")
+        if not current[1]:
+            raise AuthenticationFailed("User inactive or deleted.")
+
+        loaded = {"id": user_id, "is_staff": current[2], "deleted_at": None, "token_version": claims["ver"]}
+        user = User.from_db(None, TOKEN_USER_FIELDS, [loaded[name] for name in TOKEN_USER_FIELDS])
+        return user, claims
+
+    def authenticate_header(self, request):
+        return f'{self.keyword} realm="api"'
@@ -46,6 +46,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     role = models.CharField(max_length=32, default='user')
     is_staff = models.BooleanField(default=False)
     is_admin = models.BooleanField(default=False)
+    # Bumped to revoke every signed API token issued to the user
+    token_version = models.PositiveIntegerField(default=0)
 
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email']
@@ -1,11 +1,14 @@
 from rest_framework import serializers
 from .models import User
+from .authentication import revoke_tokens
+from api.serializers import TimedSerializerMixin, TimedListSerializer
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
     class Meta:
         model = User
+        list_serializer_class = TimedListSerializer
         fields = [
             'id', 'username', 'email', 'password',
             'first_name', 'last_name', 'timezone',
@@ -32,4 +35,7 @@ class UserSerializer(serializers.ModelSerializer):
         if password:
             instance.set_password(password)
         instance.save()
+        if password:
+            # Tokens issued under the old password stop working
+            revoke_tokens(instance)
         return instance
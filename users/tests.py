@@ -1,3 +1,91 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from users import authentication
+from users.authentication import issue_token
+from users.models import User
 
-# Create your tests here.
+
+@override_settings(API_TOKEN_CACHE_SECONDS=30)
+class SignedTokenAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner", "owner@example.com", "password")
+
+    def setUp(self):
+        authentication._token_versions.clear()
+        self.client = APIClient()
+
+    def bearer(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_token(user)}")
+
+    def test_obtain_token_with_credentials(self):
+        response = self.client.post("/api/users/token/", {"username": "owner", "password": "password"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        self.assertEqual(self.client.get("/api/tags/").status_code, 200)
+
+        response = self.client.post("/api/users/token/", {"username": "owner", "password": "wrong"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_cached_token_authorizes_without_queries(self):
+        from rest_framework.test import APIRequestFactory
+        from users.authentication import SignedTokenAuthentication
+
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {issue_token(self.user)}")
+        SignedTokenAuthentication().authenticate(request)
+        with self.assertNumQueries(0):
+            user, claims = SignedTokenAuthentication().authenticate(request)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertFalse(user.is_staff)
+        self.assertTrue(user.is_active)
+
+    def test_tampered_and_expired_tokens_are_rejected(self):
+        token = issue_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token[:-2]}xx")
+        self.assertEqual(self.client.get("/api/tags/").status_code, 401)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        with override_settings(API_TOKEN_MAX_AGE=-1):
+            self.assertEqual(self.client.get("/api/tags/").status_code, 401)
+
+    def test_revoked_tokens_are_rejected(self):
+        self.bearer(self.user)
+        self.assertEqual(self.client.get("/api/tags/").status_code, 200)
+
+        response = self.client.post(f"/api/users/{self.user.pk}/revoke-tokens/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get("/api/tags/").status_code, 401)
+
+        self.user.refresh_from_db()
+        self.bearer(self.user)
+        self.assertEqual(self.client.get("/api/tags/").status_code, 200)
+
+    def test_users_cannot_revoke_other_users_tokens(self):
+        other = User.objects.create_user("other", "other@example.com", "password")
+        self.bearer(self.user)
+        response = self.client.post(f"/api/users/{other.pk}/revoke-tokens/")
+        self.assertIn(response.status_code, (403, 404))
+
+    def test_demoted_staff_loses_staff_access(self):
+        staff = User.objects.create_user("admin", "admin@example.com", "password", is_staff=True)
+        self.bearer(staff)
+        self.assertEqual(self.client.get("/api/users/").status_code, 200)
+
+        User.objects.filter(pk=staff.pk).update(is_staff=False)
+        with override_settings(API_TOKEN_CACHE_SECONDS=0):
+            self.assertEqual(self.client.get("/api/users/").status_code, 403)
+
+    def test_password_change_revokes_tokens(self):
+        staff = User.objects.create_user("admin", "admin@example.com", "password", is_staff=True)
+        owner = APIClient()
+        owner.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_token(self.user)}")
+        self.assertEqual(owner.get("/api/tags/").status_code, 200)
+
+        self.bearer(staff)
+        response = self.client.patch(f"/api/users/{self.user.pk}/", {"password": "changed"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(owner.get("/api/tags/").status_code, 401)
+
+        response = self.client.post("/api/users/token/", {"username": "owner", "password": "changed"}, format="json")
+        owner.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        self.assertEqual(owner.get("/api/tags/").status_code, 200)
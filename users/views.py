@@ -1,10 +1,14 @@
 from rest_framework import viewsets
-from rest_framework.permissions import IsAdminUser, AllowAny
+from rest_framework.permissions import IsAdminUser, AllowAny, IsAuthenticated
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from django.conf import settings
+from django.contrib.auth import authenticate
 from django.shortcuts import get_object_or_404
+from .authentication import issue_token, revoke_tokens
 from .models import User
 from .serializers import UserSerializer
 
@@ -34,3 +38,36 @@ class UserViewSet(viewsets.ModelViewSet):
         user = get_object_or_404(User, username=username)
         serializer = self.get_serializer(user)
         return Response(serializer.data)
+
+    @swagger_auto_schema(
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['username', 'password'],
+            properties={
+                'username': openapi.Schema(type=openapi.TYPE_STRING),
+                'password': openapi.Schema(type=openapi.TYPE_STRING),
+            },
+        ),
+        responses={200: "Bearer token and its lifetime in seconds", 400: "Invalid credentials"}
+    )
+    @action(detail=False, methods=['post'], url_path='token', permission_classes=[AllowAny], authentication_classes=[])
+    def obtain_token(self, request):
+        user = authenticate(
+            request,
+            username=request.data.get('username'),
+            password=request.data.get('password'),
+        )
+        if user is None:
+            return Response({"error": "Invalid username or password"}, status=400)
+
+        return Response({"token": issue_token(user), "expires_in": settings.API_TOKEN_MAX_AGE})
+
+    @swagger_auto_schema(responses={204: "All tokens issued to the user are revoked"})
+    @action(detail=True, methods=['post'], url_path='revoke-tokens', permission_classes=[IsAuthenticated])
+    def revoke_user_tokens(self, request, pk=None):
+        user = self.get_object()
+        if not (request.user.is_staff or request.user.pk == user.pk):
+            raise PermissionDenied()
+
+        revoke_tokens(user)
+        return Response(status=204)
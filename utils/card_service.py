@@ -0,0 +1,55 @@
+from django.db import transaction
+from items.models import Item
+
+# Everything an item card in the gallery needs
+CARD_EXPAND = ["link", "link.media_urls", "file_group", "file_group.files"]
+
+
+def build_item_card(item):
+    """
+    Builds the card for a single Item. The item should come from a
+    queryset prepared with ItemSerializer.setup_eager_loading(expand=CARD_EXPAND).
+    """
+    from items.serializers import ItemSerializer
+
+    return ItemSerializer(item, context={"expand": CARD_EXPAND}).data
+
+
+def refresh_item_cards(queryset, chunk_size=500):
+    """
+    Rebuilds and stores the cards for every Item in the queryset, in chunks.
+    Uses bulk_update so no signals are fired (and no recursion happens).
+    Returns the number of cards written.
+    """
+    from items.serializers import ItemSerializer
+
+    ids = list(queryset.order_by().values_list("id", flat=True))
+    written = 0
+
+    for start in range(0, len(ids), chunk_size):
+        items = list(ItemSerializer.setup_eager_loading(
+            Item.objects.filter(id__in=ids[start:start + chunk_size]),
+            expand=CARD_EXPAND,
+        ))
+        for item in items:
+            item.card = build_item_card(item)
+        Item.objects.bulk_update(items, ["card"])
+        written += len(items)
+
+    return written
+
+
+def schedule_card_refresh(queryset):
+    """
+    Refreshes the cards once the current transaction commits
+    (immediately when not inside an atomic block).
+    """
+    transaction.on_commit(lambda: refresh_item_cards(queryset))
+
+
+def invalidate_item_cards(queryset):
+    """
+    Set-based invalidation for bulk operations. Cleared cards are rebuilt
+    lazily when the card list reads them (or by `rebuild_item_cards`).
+    """
+    return queryset.update(card=None)
@@ -0,0 +1,87 @@
+import random
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+
+PRIMARY = "default"
+
+# Routing state of the request being handled (None outside ReplicaRoutingMiddleware)
+_state = ContextVar("db_routing", default=None)
+
+
+class RoutingState:
+    def __init__(self, read_replica):
+        # Whether reads may go to a replica; cleared by the first write
+        self.read_replica = read_replica
+        self.wrote = False
+
+
+def begin_request(read_replica):
+    return _state.set(RoutingState(read_replica))
+
+
+def end_request(token):
+    state = _state.get()
+    _state.reset(token)
+    return state
+
+
+def read_from_primary():
+    """
+    Sends the rest of the current request's reads to the primary, for
+    reads that can't tolerate replication lag.
+    """
+    state = _state.get()
+    if state is not None:
+        state.read_replica = False
+
+
+def pin_primary():
+    """
+    Sends the rest of the current request's reads to the primary.
+    """
+    state = _state.get()
+    if state is not None:
+        state.read_replica = False
+        state.wrote = True
+
+
+class ReplicaRouter:
+    """
+    Sends reads made while handling a safe-method request to a random
+    replica (settings.DATABASE_REPLICAS), everything else to the primary.
+    After a write the request is pinned to the primary, and
+    ReplicaRoutingMiddleware keeps the client pinned for
+    REPLICA_PIN_SECONDS so it reads its own writes. Reads inside a
+    transaction, in management commands and in signal handlers outside a
+    request always use the primary.
+    """
+
+    def __init__(self, replicas=None):
+        self.replicas = list(settings.DATABASE_REPLICAS if replicas is None else replicas)
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            # Related lookups follow the database the instance came from
+            return instance._state.db
+
+        state = _state.get()
+        if not self.replicas or state is None or not state.read_replica:
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        pin_primary()
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in self.replicas:
+            return False
+        return None
@@ -1,17 +1,42 @@
 import io
+import logging
 import os
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload, MediaIoBaseDownload
+import threading
 from utils.g_drive_authentication import authenticate_user
+from utils.request_timing import timed
+from utils.metrics import DRIVE_SECONDS, DRIVE_UPLOAD_BYTES
 from django.conf import settings
 
+logger = logging.getLogger(__name__)
+
 # Folder ID in Google Drive where files will be uploaded
 DRIVE_FOLDER_ID = settings.GDRIVE_FOLDER_ID
 
+# Drive clients are built once per thread (httplib2 isn't thread-safe) and
+# dropped after a fork (see gunicorn.conf.py post_fork).
+_clients = threading.local()
+
+def get_drive_service():
+    service = getattr(_clients, "drive", None)
+    if service is None:
+        # googleapiclient is heavy to import, so only load it once Drive is actually used
+        from googleapiclient.discovery import build
+
+        creds = authenticate_user()
+        service = _clients.drive = build("drive", "v3", credentials=creds)
+    return service
+
+def reset_drive_service():
+    global _clients
+    _clients = threading.local()
+
+@timed("drive")
+@DRIVE_SECONDS.labels("upload").time()
 def upload_to_drive_oauth(django_file, file_name):
+    from googleapiclient.http import MediaIoBaseUpload
+
     # 1. Authenticate as the user
-    creds = authenticate_user()
-    service = build("drive", "v3", credentials=creds)
+    service = get_drive_service()
 
     # Prepare file metadata
     file_metadata = {
@@ -31,6 +56,7 @@ def upload_to_drive_oauth(django_file, file_name):
     )
 
     file_id = uploaded_file.get("id")
+    DRIVE_UPLOAD_BYTES.inc(django_file.size)
 
     # 4. Make file publicly accessible 
     # The user (you) is now the owner, so this permission is simple.
@@ -39,16 +65,18 @@ def upload_to_drive_oauth(django_file, file_name):
         body={"role": "reader", "type": "anyone"},
     ).execute()
 
-    print(f"Gdrive: Uploaded file ID: {file_id}")
-    print(f"Public URL: https://drive.google.com/file/d/{file_id}/view")
+    logger.info("Gdrive: Uploaded file ID: %s", file_id)
 
      # Return public URL
     return f"https://drive.google.com/file/d/{file_id}/view"
 
+@timed("drive")
+@DRIVE_SECONDS.labels("download").time()
 def download_from_drive_oauth(file_id):
+    from googleapiclient.http import MediaIoBaseDownload
+
     # 1. Authenticate and build service
-    creds = authenticate_user()
-    service = build("drive", "v3", credentials=creds)
+    service = get_drive_service()
 
     # 2. Request the file content
     request = service.files().get_media(fileId=file_id)
@@ -60,7 +88,7 @@ def download_from_drive_oauth(file_id):
     done = False
     while done is False:
         status, done = downloader.next_chunk()
-        print(f"Gdrive: Download {int(status.progress() * 100)}%.")
+        logger.debug("Gdrive: Download %d%%.", int(status.progress() * 100))
 
     # 4. Move the pointer to the beginning of the buffer
     file_buffer.seek(0)
@@ -68,13 +96,14 @@ def download_from_drive_oauth(file_id):
     # Return the buffer content (or you could save it to a local file)
     return file_buffer
 
+@timed("drive")
+@DRIVE_SECONDS.labels("rename").time()
 def rename_drive_file(file_id, new_name):
     """
     Renames a file on Google Drive.
     """
     # 1. Authenticate and build service
-    creds = authenticate_user()
-    service = build("drive", "v3", credentials=creds)
+    service = get_drive_service()
 
     # 2. Define the change (the new name)
     file_metadata = {
@@ -89,11 +118,11 @@ def rename_drive_file(file_id, new_name):
             fields='id, name'
         ).execute()
 
-        print(f"Gdrive: File renamed successfully to: {updated_file.get('name')}")
+        logger.info("Gdrive: File renamed successfully to: %s", updated_file.get('name'))
         return updated_file
 
     except Exception as e:
-        print(f"Gdrive: An error occurred: {e}")
+        logger.error("Gdrive: Rename of %s failed: %s", file_id, e)
         return None
 
 def rename_local_drive_file(old_name, new_name):
@@ -102,11 +131,11 @@ def rename_local_drive_file(old_name, new_name):
 
     try:
         os.rename(old_path, new_path)
-        print(f"Local Drive: File renamed successfully to: {new_path}")
+        logger.info("Local Drive: File renamed successfully to: %s", new_path)
         return True
     except FileNotFoundError:
-        print("Local Drive: The file was not found on your G: drive.")
+        logger.warning("Local Drive: %s was not found on the synced Drive path.", old_path)
         return False
     except Exception as e:
-        print(f"Local Drive: Error: {e}")
+        logger.error("Local Drive: Rename of %s failed: %s", old_path, e)
         return False
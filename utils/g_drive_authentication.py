@@ -1,7 +1,5 @@
 import os
 import pickle
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
 
 # 🔑 Path to the secrets file you downloaded from Google Cloud.
 CLIENT_SECRETS_FILE = "client_secrets.json"
@@ -9,6 +7,10 @@ SCOPES = ["https://www.googleapis.com/auth/drive"]
 
 def authenticate_user():
     """Performs the OAuth flow to get user credentials."""
+    # Imported here so workers that never touch Drive don't load the Google libraries
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+
     creds = None
 
     # The file token.pickle stores the user's access and refresh tokens, 
@@ -0,0 +1,270 @@
+import orjson
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from items.models import Item, Link, MediaURL, FileGroup, File
+from utils.tag_service import get_or_create_tags, is_auto_tag, tags_for_url, tags_for_file_origins
+
+EXPORT_CHUNK_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+
+def export_queryset():
+    return (
+        Item.objects.order_by("id")
+        .defer("card")
+        .select_related("link", "file_group")
+        .prefetch_related("tags", "link__media_urls", "file_group__files")
+    )
+
+
+def item_to_row(item):
+    """
+    Flattens an Item and everything hanging off it into one JSON-ready dict.
+    """
+    link = getattr(item, "link", None)
+    file_group = getattr(item, "file_group", None)
+
+    return {
+        "id": item.id,
+        "owner": item.owner_id,
+        "name": item.name,
+        "type": item.type,
+        "date_of_origin": item.date_of_origin,
+        "created_at": item.created_at,
+        "tags": [tag.name for tag in item.tags.all()],
+        "link": {
+            "url": link.url,
+            "media_url": link.media_url,
+            "media_urls": [
+                {
+                    "url": m.url,
+                    "hd_url": m.hd_url,
+                    "sd_url": m.sd_url,
+                    "media_type": m.media_type,
+                    "order": m.order,
+                }
+                for m in link.media_urls.all()
+            ],
+        } if link else None,
+        "file_group": {
+            "description": file_group.description,
+            "files": [
+                {
+                    "file_name": f.file_name,
+                    "file_type": f.file_type,
+                    "file_origin": f.file_origin,
+                    "file_url": f.file_url,
+                }
+                for f in file_group.files.all()
+            ],
+        } if file_group else None,
+    }
+
+
+def export_ndjson(queryset=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields one NDJSON line per Item. iterator(chunk_size=...) runs the
+    prefetches per chunk, so memory stays flat regardless of library size.
+    """
+    queryset = export_queryset() if queryset is None else queryset
+    for item in queryset.iterator(chunk_size=chunk_size):
+        yield orjson.dumps(item_to_row(item), option=orjson.OPT_UTC_Z) + b"\n"
+
+
+def is_list_of(value, check):
+    return value is None or (isinstance(value, list) and all(check(v) for v in value))
+
+
+def has_text(obj, key):
+    return isinstance(obj, dict) and isinstance(obj.get(key), str) and bool(obj[key])
+
+
+def validate_row(row):
+    if not (has_text(row, "name") and has_text(row, "type")):
+        raise ValueError("Each line must be an item object with 'name' and 'type'.")
+    if not is_list_of(row.get("tags"), lambda t: isinstance(t, str) and t and "," not in t):
+        raise ValueError("'tags' must be a list of tag names.")
+    link = row.get("link")
+    if link is not None and not has_text(link, "url"):
+        raise ValueError("'link' must be an object with a 'url'.")
+    if link is not None and not is_list_of(link.get("media_urls"), lambda m: has_text(m, "url")):
+        raise ValueError("'link.media_urls' must be a list of objects with a 'url'.")
+    file_group = row.get("file_group")
+    if file_group is not None and not (
+        isinstance(file_group, dict) and is_list_of(file_group.get("files"), lambda f: has_text(f, "file_name"))
+    ):
+        raise ValueError("'file_group.files' must be a list of objects with a 'file_name'.")
+
+
+def row_tag_names(row):
+    """
+    Tag names for an imported row, with the src-/subreddit-/user- tags
+    recomputed as auto_tag_item_from_src would. Rows with a link URL the
+    refiner can't parse keep their exported tags unchanged.
+    """
+    names = set(row.get("tags") or [])
+    link = row.get("link")
+    file_group = row.get("file_group")
+    try:
+        auto_names = set(tags_for_url(link["url"] if link else None))
+    except ValueError:
+        return names
+    if file_group:
+        auto_names.update(tags_for_file_origins({f.get("file_origin", "") for f in file_group.get("files") or []}))
+    return {name for name in names if not is_auto_tag(name)} | auto_names
+
+
+class LibraryImporter:
+    """
+    Imports an NDJSON stream produced by export_ndjson() for one owner.
+    Rows are written in batches with bulk_create; items whose link URL
+    already exists are skipped. A batch the database rejects is retried
+    row by row so only the offending rows are reported as errors.
+    Auto source tags are computed while writing each batch. Item cards are
+    left empty and built lazily by ?mode=card lists, or ahead of time with
+    `manage.py rebuild_item_cards --missing-only`, so the request's work is
+    bounded by the writes and doesn't grow with an extra pass at the end.
+    """
+
+    def __init__(self, owner, batch_size=IMPORT_BATCH_SIZE):
+        self.owner = owner
+        self.batch_size = batch_size
+        self.created = 0
+        self.skipped = 0
+        self.errors = []
+
+    def run(self, lines):
+        batch = []
+        for line_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = orjson.loads(line)
+                validate_row(row)
+            except ValueError as e:
+                self.add_error(line_number, e)
+                continue
+
+            batch.append((line_number, row))
+            if len(batch) >= self.batch_size:
+                self.write_rows(batch)
+                batch = []
+
+        if batch:
+            self.write_rows(batch)
+
+        return {
+            "created": self.created,
+            "skipped": self.skipped,
+            "errors": self.errors,
+        }
+
+    def add_error(self, line_number, error):
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_number, "error": str(error)})
+
+    def write_rows(self, numbered_rows):
+        try:
+            self.write_batch([row for _, row in numbered_rows])
+            return
+        except (DatabaseError, ValidationError) as e:
+            if len(numbered_rows) == 1:
+                self.add_error(numbered_rows[0][0], e)
+                return
+
+        for line_number, row in numbered_rows:
+            try:
+                self.write_batch([row])
+            except (DatabaseError, ValidationError) as e:
+                self.add_error(line_number, e)
+
+    @transaction.atomic
+    def write_batch(self, rows):
+        # Link URLs are unique: drop rows already in the library (or repeated in this batch)
+        urls = [row["link"]["url"] for row in rows if row.get("link")]
+        seen = set(Link.objects.filter(url__in=urls).values_list("url", flat=True))
+        kept = []
+        skipped = 0
+        for row in rows:
+            link = row.get("link")
+            if link:
+                if link["url"] in seen:
+                    skipped += 1
+                    continue
+                seen.add(link["url"])
+            kept.append(row)
+        if not kept:
+            self.skipped += skipped
+            return
+
+        items = Item.objects.bulk_create([
+            Item(
+                owner=self.owner,
+                name=row["name"],
+                type=row["type"],
+                date_of_origin=row.get("date_of_origin"),
+            )
+            for row in kept
+        ])
+
+        # created_at is auto_now_add, so restore the exported value afterwards
+        restored = []
+        for item, row in zip(items, kept):
+            if row.get("created_at"):
+                item.created_at = row["created_at"]
+                restored.append(item)
+        if restored:
+            Item.objects.bulk_update(restored, ["created_at"])
+
+        # Tags: the exported manual tags plus freshly computed auto source tags
+        names = [row_tag_names(row) for row in kept]
+        tags = get_or_create_tags(name for row_names in names for name in row_names)
+        Through = Item.tags.through
+        Through.objects.bulk_create([
+            Through(item_id=item.id, tag_id=tags[name].id)
+            for item, row_names in zip(items, names)
+            for name in row_names
+        ], ignore_conflicts=True)
+
+        # Links and their media URLs
+        link_pairs = [(item, row["link"]) for item, row in zip(items, kept) if row.get("link")]
+        links = Link.objects.bulk_create([
+            Link(item=item, url=data["url"], media_url=data.get("media_url"))
+            for item, data in link_pairs
+        ])
+        MediaURL.objects.bulk_create([
+            MediaURL(
+                link=link,
+                url=m["url"],
+                hd_url=m.get("hd_url"),
+                sd_url=m.get("sd_url"),
+                media_type=m.get("media_type", "video"),
+                order=m.get("order", i),
+            )
+            for link, (_, data) in zip(links, link_pairs)
+            for i, m in enumerate(data.get("media_urls") or [])
+        ])
+
+        # File groups and their files
+        group_pairs = [(item, row["file_group"]) for item, row in zip(items, kept) if row.get("file_group")]
+        groups = FileGroup.objects.bulk_create([
+            FileGroup(item=item, description=data.get("description", ""))
+            for item, data in group_pairs
+        ])
+        File.objects.bulk_create([
+            File(
+                file_group=group,
+                file_name=f["file_name"],
+                file_type=f.get("file_type", ""),
+                file_origin=f.get("file_origin", ""),
+                file_url=f.get("file_url"),
+            )
+            for group, (_, data) in zip(groups, group_pairs)
+            for f in data.get("files") or []
+        ])
+
+        # Counted last: a failed batch is rolled back and retried row by row
+        self.skipped += skipped
+        self.created += len(items)
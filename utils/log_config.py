@@ -0,0 +1,125 @@
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import weakref
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+import orjson
+
+# Set per request by api.middleware.RequestIdMiddleware
+request_id_var = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed with `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per line: timestamp, level, logger, message, request id,
+    exception text and any `extra=` fields.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": request_id_var.get() or getattr(getattr(record, "request", None), "request_id", None),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key not in entry:
+                entry[key] = value
+        return orjson.dumps(entry, default=str).decode()
+
+    def formatTime(self, record, datefmt=None):
+        return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z"
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `rate` records per call site through every `period` seconds
+    for WARNING and above, so a failing dependency can't flood the logs.
+    The first record of the next window carries the number suppressed.
+    """
+
+    def __init__(self, rate=10, period=60, level=logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.period = period
+        self.level = level
+        self.windows = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < self.level:
+            return True
+
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self.lock:
+            start, count, suppressed = self.windows.get(key, (now, 0, 0))
+            if now - start >= self.period:
+                if suppressed:
+                    record.suppressed = suppressed
+                start, count, suppressed = now, 0, 0
+
+            if count >= self.rate:
+                self.windows[key] = (start, count, suppressed + 1)
+                return False
+            self.windows[key] = (start, count + 1, suppressed)
+            return True
+
+
+_handlers = weakref.WeakSet()
+
+
+class QueueLogHandler(QueueHandler):
+    """
+    Formats records on the calling thread and hands them to a background
+    QueueListener that does the actual (blocking) write, so request threads
+    never wait on log I/O. The listener thread is restarted in forked
+    children (gunicorn preload_app), since threads don't survive a fork.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        self.target = logging.StreamHandler(stream or sys.stdout)
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+        _handlers.add(self)
+
+    def restart_after_fork(self):
+        self.queue = queue.SimpleQueue()
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def close(self):
+        _handlers.discard(self)
+        if self.listener._thread is not None:
+            self.listener.stop()
+        super().close()
+
+
+def _restart_listeners():
+    for handler in list(_handlers):
+        handler.restart_after_fork()
+
+
+def _stop_listeners():
+    # Flush whatever is still queued on interpreter exit
+    for handler in list(_handlers):
+        if handler.listener._thread is not None:
+            handler.listener.stop()
+
+
+os.register_at_fork(after_in_child=_restart_listeners)
+atexit.register(_stop_listeners)
@@ -1,12 +1,22 @@
+import logging
 import threading
-import yt_dlp
 import subprocess
 import json
 from urllib.parse import urlparse
 from typing import Dict, Any
+from utils.request_timing import timed
+from utils.metrics import EXTRACTION_SECONDS, EXTRACTION_TIMEOUTS
+
+logger = logging.getLogger(__name__)
 
 def get_media_details(url: str) -> Dict[str, Any]:
+    # yt_dlp takes a large share of worker boot time and memory, load it on
+    # first use; here rather than in the thread so a cold import doesn't eat
+    # into the extraction time limit
+    import yt_dlp
+
     result = {"original_url": url, "media": []}
+    domain = urlparse(url).netloc.lower()
 
     # We use a list to store the yt-dlp result so the thread can modify it
     ext_data = {"info": None, "error": None}
@@ -24,12 +34,14 @@ def get_media_details(url: str) -> Dict[str, Any]:
             ext_data["error"] = e
 
     # Start the thread
-    thread = threading.Thread(target=target)
-    thread.start()
-    thread.join(timeout=10) # <--- STRICT 10 SECOND LIMIT
+    with timed("ytdlp"), EXTRACTION_SECONDS.labels("yt-dlp", domain).time():
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join(timeout=10) # <--- STRICT 10 SECOND LIMIT
 
     if thread.is_alive():
-        print(f"!!! yt-dlp timed out for {url}. Killing thread and moving to gallery-dl.")
+        EXTRACTION_TIMEOUTS.labels("yt-dlp", domain).inc()
+        logger.warning("yt-dlp timed out for %s, moving on to gallery-dl.", url)
         # We can't actually 'kill' a thread easily, but we can ignore it 
         # and move on, letting it finish in the background.
     elif ext_data["info"]:
@@ -45,7 +57,8 @@ def get_media_details(url: str) -> Dict[str, Any]:
     # 2. Image Extraction (gallery-dl) - Handles galleries and mixed media
     try:
         cmd = ["gallery-dl", "-j", url]
-        process = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8')
+        with timed("gallerydl"), EXTRACTION_SECONDS.labels("gallery-dl", domain).time():
+            process = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8')
 
         if process.returncode == 0:
             data = json.loads(process.stdout)
@@ -80,7 +93,7 @@ def get_media_details(url: str) -> Dict[str, Any]:
                         "media_type": "image"
                     })
     except Exception as e:
-        print(f"Gallery-dl error: {e}") 
+        logger.error("gallery-dl failed for %s: %s", url, e)
 
     return result
 
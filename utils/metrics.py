@@ -0,0 +1,101 @@
+import os
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+
+# With PROMETHEUS_MULTIPROC_DIR set (gunicorn), every worker writes its samples
+# to mmap files in that directory and /metrics aggregates them on scrape.
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+if MULTIPROCESS:
+    # Management commands can run without gunicorn.conf.py having created it
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+REQUEST_SECONDS = Histogram(
+    "api_request_seconds",
+    "API request latency by DRF view and action.",
+    ["view", "action", "method", "status"],
+)
+
+EXTRACTION_SECONDS = Histogram(
+    "extraction_seconds",
+    "Media extraction latency by extractor and source domain.",
+    ["extractor", "domain"],
+    buckets=SLOW_BUCKETS,
+)
+EXTRACTION_TIMEOUTS = Counter(
+    "extraction_timeouts_total",
+    "Media extractions abandoned after the time limit.",
+    ["extractor", "domain"],
+)
+
+DRIVE_SECONDS = Histogram(
+    "drive_request_seconds",
+    "Google Drive API call latency by operation.",
+    ["operation"],
+    buckets=SLOW_BUCKETS,
+)
+DRIVE_UPLOAD_BYTES = Counter(
+    "drive_upload_bytes_total",
+    "Bytes uploaded to Google Drive.",
+)
+
+PROXY_UPSTREAM_SECONDS = Histogram(
+    "proxy_upstream_seconds",
+    "Media proxy time to upstream response headers, by domain.",
+    ["domain"],
+)
+PROXY_BYTES = Counter(
+    "proxy_bytes_total",
+    "Bytes streamed through the media proxy, by domain.",
+    ["domain"],
+)
+
+
+# Anything else (arbitrary client-chosen verbs) shares one label value
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+def method_label(method):
+    return method if method in HTTP_METHODS else "other"
+
+
+def status_class(status_code):
+    return f"{status_code // 100}xx"
+
+
+def view_labels(request):
+    """
+    (view, action) for the request: the DRF view class and viewset action
+    (list, retrieve, neighbors, ...) or the plain view function name.
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched", ""
+    func = match.func
+    view_class = getattr(func, "cls", None) or getattr(func, "view_class", None)
+    view = view_class.__name__ if view_class else getattr(func, "__name__", "unknown")
+    actions = getattr(func, "actions", None) or {}
+    return view, actions.get(request.method.lower(), request.method.lower())
+
+
+def render_latest():
+    """
+    Current metrics in the Prometheus text format, aggregated over all
+    worker processes in multiprocess mode.
+    """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """
+    Called from gunicorn's child_exit hook so a dead worker's live gauges are dropped.
+    """
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,98 @@
+import heapq
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Timings of the request being handled (None outside RequestTimingMiddleware)
+_current = ContextVar("request_timings", default=None)
+
+# Statements kept per request for the slow-request log; the rest only count
+MAX_KEPT_QUERIES = 20
+
+
+class RequestTimings:
+    """
+    Per-request accumulator: total milliseconds and call count per named
+    span (db, serialize, ytdlp, drive, ...), plus the slowest SQL statements.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans = {}
+        # Min-heap of (ms, seq, sql), bounded so big imports/exports stay flat
+        self._queries = []
+        self._query_seq = 0
+        self._active = set()
+
+    def add(self, name, seconds, count=1):
+        total, calls = self.spans.get(name, (0.0, 0))
+        self.spans[name] = (total + seconds * 1000, calls + count)
+
+    def add_query(self, sql, ms):
+        self._query_seq += 1
+        entry = (ms, self._query_seq, sql)
+        if len(self._queries) < MAX_KEPT_QUERIES:
+            heapq.heappush(self._queries, entry)
+        elif ms > self._queries[0][0]:
+            heapq.heapreplace(self._queries, entry)
+
+    def slowest_queries(self):
+        """
+        (sql, ms) of the slowest statements, slowest first.
+        """
+        return [(sql, ms) for ms, _, sql in sorted(self._queries, reverse=True)]
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def server_timing(self):
+        """
+        Value for the Server-Timing response header.
+        """
+        parts = [
+            f'{name};dur={total:.1f};desc="{calls}x"'
+            for name, (total, calls) in self.spans.items()
+        ]
+        parts.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(parts)
+
+    def as_dict(self):
+        return {
+            "total_ms": round(self.elapsed_ms(), 1),
+            **{f"{name}_ms": round(total, 1) for name, (total, _) in self.spans.items()},
+            **{f"{name}_count": calls for name, (_, calls) in self.spans.items()},
+        }
+
+
+def start_request():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def timed(name):
+    """
+    Adds the time spent in the block to the current request's `name` span.
+    Nested blocks with the same name are only counted once. No-op outside
+    a request.
+    """
+    timings = _current.get()
+    if timings is None or name in timings._active:
+        yield
+        return
+
+    timings._active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._active.discard(name)
+        timings.add(name, time.perf_counter() - start)
@@ -0,0 +1,156 @@
+import base64
+from datetime import timedelta
+import orjson
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from items.models import Item, Link, MediaURL, FileGroup, File, Tombstone
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 1000
+
+
+# Flat row shapes returned for the non-item models, and the path to their owner
+SYNC_MODELS = {
+    "links": (Link, ["id", "item_id", "url", "media_url", "updated_at"], "item__owner_id"),
+    "media_urls": (MediaURL, ["id", "link_id", "url", "hd_url", "sd_url", "media_type", "order", "updated_at"], "link__item__owner_id"),
+    "file_groups": (FileGroup, ["id", "item_id", "description", "updated_at"], "item__owner_id"),
+    "files": (File, ["id", "file_group_id", "file_name", "file_type", "file_origin", "file_url", "updated_at"], "file_group__item__owner_id"),
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorExpired(InvalidCursor):
+    """
+    The cursor predates the tombstone retention window, so deletions since
+    then may have been pruned and the client has to sync from scratch.
+    """
+
+
+def encode_cursor(positions, upper):
+    raw = orjson.dumps({**positions, "_upper": upper}, option=orjson.OPT_UTC_Z)
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    A cursor holds one (updated_at, id) keyset position per synced model,
+    plus the time up to which it has seen changes. Returns (positions, upper).
+    """
+    if not cursor:
+        return {}, None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        positions = orjson.loads(raw)
+        upper = parse_datetime(positions.pop("_upper"))
+        return {
+            name: (parse_datetime(position[0]), int(position[1]))
+            for name, position in positions.items()
+        }, upper
+    except (ValueError, TypeError, KeyError, IndexError, AttributeError):
+        raise InvalidCursor("Invalid sync cursor.")
+
+
+def touch_items(queryset):
+    """
+    Bumps updated_at for changes that don't go through Item.save(),
+    e.g. tag changes on the M2M through table.
+    """
+    return queryset.update(updated_at=timezone.now())
+
+
+def record_tombstone(model, object_id, item_id=None, owner_id=None):
+    Tombstone.objects.create(model=model, object_id=object_id, item_id=item_id, owner_id=owner_id)
+
+
+def prune_tombstones(days=None):
+    """
+    Deletes tombstones past the retention window. Cursors that old are
+    rejected by changes_since(), so no client can still need them.
+    """
+    days = settings.SYNC_TOMBSTONE_RETENTION_DAYS if days is None else days
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
+
+
+def after_position(queryset, position, field):
+    if position is None:
+        return queryset
+    timestamp, pk = position
+    return queryset.filter(Q(**{f"{field}__gt": timestamp}) | Q(**{field: timestamp, "id__gt": pk}))
+
+
+def changes_since(cursor=None, limit=DEFAULT_BATCH_SIZE, owner_id=None):
+    """
+    Returns every row changed after the cursor, at most `limit` per model,
+    together with the cursor for the next call and whether more is waiting.
+    Only rows belonging to `owner_id`'s items when given.
+    Rows changed in the last SYNC_SAFETY_LAG_SECONDS are held back until a
+    later call, so rows of still-open transactions aren't skipped.
+    """
+    from items.serializers import ItemSerializer
+    from utils.db_routing import read_from_primary
+
+    # A lagging replica could hide rows older than the cursor's upper bound for good
+    read_from_primary()
+
+    positions, since = decode_cursor(cursor)
+    now = timezone.now()
+    if since is not None and since < now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS):
+        raise CursorExpired("Sync cursor expired, start a full sync.")
+    upper = now - timedelta(seconds=settings.SYNC_SAFETY_LAG_SECONDS)
+    has_more = False
+    result = {}
+
+    def page(name, queryset, field="updated_at"):
+        nonlocal has_more
+        queryset = after_position(queryset, positions.get(name), field)
+        rows = list(queryset.filter(**{f"{field}__lt": upper}).order_by(field, "id")[:limit + 1])
+        if len(rows) > limit:
+            has_more = True
+            rows = rows[:limit]
+        if rows:
+            last = rows[-1]
+            last_ts = last[field] if isinstance(last, dict) else getattr(last, field)
+            last_id = last["id"] if isinstance(last, dict) else last.id
+            positions[name] = (last_ts, last_id)
+        return rows
+
+    def owned(queryset, path):
+        return queryset if owner_id is None else queryset.filter(**{path: owner_id})
+
+    items = page("items", ItemSerializer.setup_eager_loading(owned(Item.objects.all(), "owner_id")))
+    result["items"] = ItemSerializer(items, many=True).data
+
+    for name, (model, fields, owner_path) in SYNC_MODELS.items():
+        result[name] = page(name, owned(model.objects.values(*fields), owner_path))
+
+    result["deleted"] = page(
+        "deleted",
+        owned(Tombstone.objects.values("id", "model", "object_id", "item_id", "deleted_at"), "owner_id"),
+        field="deleted_at",
+    )
+
+    result["next_cursor"] = encode_cursor({
+        name: [timestamp, pk] for name, (timestamp, pk) in positions.items()
+    }, upper)
+    result["has_more"] = has_more
+    return result
+
+
+def collection_version():
+    """
+    Cheap fingerprint of the library that changes on every item, tag
+    membership or deletion change (all of which move updated_at or write a
+    tombstone). Served from the (updated_at, id) and (deleted_at, id) indexes,
+    and consistent across worker processes, so it can key shared caches.
+    """
+    from django.db.models import Max
+
+    last_update = Item.objects.aggregate(last=Max("updated_at"))["last"]
+    last_delete = Tombstone.objects.aggregate(last=Max("deleted_at"))["last"]
+    return f"{last_update.timestamp() if last_update else 0}:{last_delete.timestamp() if last_delete else 0}"
@@ -0,0 +1,148 @@
+import random
+import uuid
+from itertools import accumulate
+from django.db import transaction
+from items.models import Item, Link, MediaURL, FileGroup, File
+from users.models import User
+from utils.tag_service import get_or_create_tags, tags_for_url, tags_for_file_origins
+
+WORDS = [
+    "cat", "dog", "sunset", "beach", "mountain", "recipe", "guitar", "react",
+    "python", "travel", "meme", "news", "science", "space", "art", "music",
+    "football", "anime", "coffee", "garden",
+]
+SUBREDDITS = [f"sub{i}" for i in range(200)]
+TWITTER_USERS = [f"user{i}" for i in range(200)]
+
+# Seeded files never point at Drive, so deleting them doesn't trigger Drive renames
+SEED_FILE_ORIGIN = "seed"
+
+
+def zipf_cum_weights(n, s=1.1):
+    """
+    Cumulative weights for random.choices: rank k is picked with probability ~ 1/k^s.
+    """
+    return list(accumulate(1 / (k ** s) for k in range(1, n + 1)))
+
+
+def fake_media_details(url, rng):
+    """
+    Offline stand-in for media_extractor.get_media_details(): same result
+    shape, with 1-4 video or image entries derived from the URL.
+    """
+    media = []
+    post_id = url.rstrip("/").rsplit("/", 1)[-1]
+    for i in range(rng.randint(1, 4)):
+        if "reddit.com" in url and rng.random() < 0.5:
+            media.append({
+                "hd_url": f"https://v.redd.it/{post_id}/DASH_1080.mp4",
+                "sd_url": f"https://v.redd.it/{post_id}/DASH_480.mp4",
+                "media_type": "video",
+            })
+        else:
+            host = "i.redd.it" if "reddit.com" in url else "pbs.twimg.com"
+            media.append({
+                "hd_url": f"https://{host}/{post_id}_{i}.jpg?name=orig",
+                "sd_url": f"https://{host}/{post_id}_{i}.jpg?name=small",
+                "media_type": "image",
+            })
+    return {"original_url": url, "media": media}
+
+
+class LibrarySeeder:
+    """
+    Writes a synthetic library with bulk_create: users, items (links with
+    media URLs, or file groups with files) and tags drawn from a Zipfian
+    distribution plus the auto source tags. Content is reproducible for a
+    given seed.
+    Item cards are left empty; they are rebuilt lazily or by rebuild_item_cards.
+    """
+
+    def __init__(self, users=10, tags=1000, tags_per_item=3, link_ratio=0.8, seed=0, batch_size=5000):
+        self.rng = random.Random(seed)
+        self.user_count = users
+        self.tag_names = [f"tag-{i}" for i in range(tags)]
+        self.tag_weights = zipf_cum_weights(tags)
+        self.tags_per_item = tags_per_item
+        self.link_ratio = link_ratio
+        self.batch_size = batch_size
+
+    def create_users(self):
+        # Fresh usernames per run, so the same seed can top up an existing library
+        prefix = f"seed-{uuid.uuid4().hex[:8]}"
+        users = []
+        for i in range(self.user_count):
+            user = User(username=f"{prefix}-{i}", email=f"{prefix}-{i}@example.com")
+            user.set_unusable_password()
+            users.append(user)
+        return User.objects.bulk_create(users)
+
+    def random_url(self, item_id):
+        # Built from the item id so URLs stay unique (Link.url is unique) across runs
+        if self.rng.random() < 0.5:
+            return f"https://www.reddit.com/r/{self.rng.choice(SUBREDDITS)}/comments/seed{item_id}"
+        return f"https://twitter.com/{self.rng.choice(TWITTER_USERS)}/status/{item_id}"
+
+    def run(self, items, progress=None):
+        users = self.create_users()
+        written = 0
+        while written < items:
+            count = min(self.batch_size, items - written)
+            self.write_batch(users, count)
+            written += count
+            if progress:
+                progress(written)
+        return {"users": len(users), "items": written}
+
+    @transaction.atomic
+    def write_batch(self, users, count):
+        rng = self.rng
+        items = Item.objects.bulk_create([
+            Item(
+                owner=rng.choice(users),
+                name=" ".join(rng.sample(WORDS, 3)),
+                type="link" if rng.random() < self.link_ratio else "file_group",
+            )
+            for _ in range(count)
+        ])
+
+        rows = []
+        for item in items:
+            names = set(rng.choices(self.tag_names, cum_weights=self.tag_weights, k=self.tags_per_item))
+            url = None
+            if item.type == "link":
+                url = self.random_url(item.id)
+                names.update(tags_for_url(url))
+            else:
+                names.update(tags_for_file_origins([SEED_FILE_ORIGIN]))
+            rows.append({"url": url, "tags": names})
+
+        tags = get_or_create_tags(name for row in rows for name in row["tags"])
+        Through = Item.tags.through
+        Through.objects.bulk_create([
+            Through(item_id=item.id, tag_id=tags[name].id)
+            for item, row in zip(items, rows)
+            for name in row["tags"]
+        ])
+
+        link_rows = [(item, row["url"]) for item, row in zip(items, rows) if row["url"]]
+        details = [fake_media_details(url, rng) for _, url in link_rows]
+        links = Link.objects.bulk_create([
+            Link(item=item, url=url, media_url=detail["media"][0]["hd_url"])
+            for (item, url), detail in zip(link_rows, details)
+        ])
+        MediaURL.objects.bulk_create([
+            MediaURL(link=link, url=m["hd_url"], hd_url=m["hd_url"], sd_url=m["sd_url"], media_type=m["media_type"], order=i)
+            for link, detail in zip(links, details)
+            for i, m in enumerate(detail["media"])
+        ])
+
+        groups = FileGroup.objects.bulk_create([
+            FileGroup(item=item, description=item.name)
+            for item, row in zip(items, rows) if not row["url"]
+        ])
+        File.objects.bulk_create([
+            File(file_group=group, file_name=f"seed_{group.item_id}_{i}.jpg", file_type=f"IMG_{i}", file_origin=SEED_FILE_ORIGIN)
+            for group in groups
+            for i in range(rng.randint(1, 3))
+        ])
@@ -1,6 +1,35 @@
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Exists, OuterRef, Prefetch
+from items.models import Item, File
 from items.models.tag import Tag
+from utils.card_service import invalidate_item_cards
+from utils.sync_service import touch_items
 from utils.url_refiner import refine_url
 
+# Tags managed by auto_tag_item_from_src
+AUTO_PREFIXES = ("src-", "subreddit-", "user-")
+
+def is_auto_tag(name):
+    return name.startswith(AUTO_PREFIXES)
+
+def get_or_create_tags(names):
+    """
+    Resolves tag names to Tag objects with one lookup, creating any
+    missing ones in a single bulk insert. Returns a {name: Tag} dict.
+    """
+    names = set(names)
+    if not names:
+        return {}
+
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = names - tags.keys()
+    if missing:
+        # ignore_conflicts keeps concurrent creators from failing on the unique name
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        tags.update({tag.name: tag for tag in Tag.objects.filter(name__in=missing)})
+
+    return tags
+
 def tags_for_url(url):
     if url is None:
         return []
@@ -29,32 +58,224 @@ def tags_for_file(file_group):
     if not file_group:
         return []
 
-    tags = ["src-file"]
     file_origins = file_group.files.values_list('file_origin', flat=True).distinct()
+    return tags_for_file_origins(file_origins)
+
+def tags_for_file_origins(file_origins):
+    tags = ["src-file"]
     for each_origin in file_origins:
         tags.append(f"src-{each_origin}")
 
     return tags
 
-def auto_tag_item_from_src(item, url, file_group):
+def set_item_tags(item, names, current_tags=None):
     """
-    Shared logic to sync source, subreddit, and user tags for an Item.
+    Makes the Item's tags exactly `names`, touching only the through rows
+    that change. Nothing is written when the tag set is unchanged.
+    Uses the prefetched item.tags (or `current_tags`) when available.
     """
+    if current_tags is None:
+        current_tags = item.tags.all()
+    current = {tag.name: tag for tag in current_tags}
+    desired = set(names)
+    if desired == current.keys():
+        return
+
+    to_add = get_or_create_tags(desired - current.keys())
+    to_remove = [tag for name, tag in current.items() if name not in desired]
 
+    if to_add:
+        item.tags.add(*to_add.values())
+    if to_remove:
+        item.tags.remove(*to_remove)
+
+def auto_tag_item_from_src(item, url, file_group, tag_names=None):
+    """
+    Shared logic to sync source, subreddit, and user tags for an Item.
+    `tag_names` replaces the manual tags in the same pass when given.
+    """
     current_tags = list(item.tags.all())
+    if tag_names is None:
+        tag_names = [tag.name for tag in current_tags]
 
     # Filter out any existing src-, subreddit-, or user- tags
-    AUTO_PREFIXES = ("src-", "subreddit-", "user-")
-    new_tags_list = [
-        tag for tag in current_tags
-        if not any(tag.name.startswith(pre) for pre in AUTO_PREFIXES)
-    ]
+    new_tag_names = {name for name in tag_names if not is_auto_tag(name)}
+    new_tag_names.update(tags_for_url(url) + tags_for_file(file_group))
+
+    set_item_tags(item, new_tag_names, current_tags=current_tags)
+
+def auto_tag_queryset(queryset):
+    """
+    Prefetches everything bulk_auto_tag_items needs in a fixed number of queries.
+    """
+    return (
+        queryset
+        .only("id", "link__id", "link__item_id", "link__url", "file_group__id", "file_group__item_id")
+        .select_related("link", "file_group")
+        .prefetch_related(
+            Prefetch("tags", queryset=Tag.objects.only("id", "name")),
+            Prefetch("file_group__files", queryset=File.objects.only("id", "file_group_id", "file_origin")),
+        )
+    )
+
+def bulk_auto_tag_items(items, dry_run=False):
+    """
+    Recomputes the src-, subreddit- and user- tags for many Items at once.
+    `items` should come from auto_tag_queryset(). Tags are computed in memory
+    and the through table is written in batches (no per-item queries).
+    Returns counts of changed items and added/removed through rows.
+    """
+    to_add = []       # (item_id, tag name)
+    to_remove = {}    # tag_id -> [item_id, ...]
+    changed_ids = set()
+    failed = 0
+
+    for item in items:
+        link = getattr(item, "link", None)
+        file_group = getattr(item, "file_group", None)
+        try:
+            auto_names = set(tags_for_url(link.url if link else None))
+        except ValueError:
+            # Unsupported or malformed link URL, leave the item alone
+            failed += 1
+            continue
+        if file_group:
+            auto_names.update(tags_for_file_origins({f.file_origin for f in file_group.files.all()}))
 
-    src_auto_tag_names = set(tags_for_url(url) + tags_for_file(file_group))
+        current = {tag.name: tag.id for tag in item.tags.all()}
+        desired = {name for name in current if not is_auto_tag(name)} | auto_names
+
+        for name in desired - current.keys():
+            to_add.append((item.id, name))
+            changed_ids.add(item.id)
+        for name in current.keys() - desired:
+            to_remove.setdefault(current[name], []).append(item.id)
+            changed_ids.add(item.id)
+
+    result = {
+        "changed": len(changed_ids),
+        "added": len(to_add),
+        "removed": sum(len(ids) for ids in to_remove.values()),
+        "failed": failed,
+    }
+    if dry_run or not changed_ids:
+        return result
+
+    Through = Item.tags.through
+    with transaction.atomic():
+        tags = get_or_create_tags(name for _, name in to_add)
+        Through.objects.bulk_create(
+            [Through(item_id=item_id, tag_id=tags[name].id) for item_id, name in to_add],
+            ignore_conflicts=True,
+            batch_size=1000,
+        )
+        for tag_id, item_ids in to_remove.items():
+            Through.objects.filter(tag_id=tag_id, item_id__in=item_ids).delete()
+
+        # Through-table writes fire no m2m_changed
+        changed = Item.objects.filter(id__in=changed_ids)
+        touch_items(changed)
+        invalidate_item_cards(changed)
+
+    return result
+
+def bulk_update_item_tags(queryset, add=(), remove=()):
+    """
+    Adds and removes tags on every Item in the queryset with set-based SQL
+    on the through table, inside one transaction. Returns the number of
+    matched items and of through rows added/removed.
+    """
+    Through = Item.tags.through
+    item_ids = queryset.order_by().values("id")
+    add = set(add) - set(remove)
+    added = removed = 0
+
+    with transaction.atomic():
+        # Touch the selection before writing: a tag filter may stop matching afterwards.
+        # Through-table writes fire no m2m_changed, so this keeps sync and cards correct.
+        matched = Item.objects.filter(id__in=item_ids)
+        matched_count = touch_items(matched)
+        invalidate_item_cards(matched)
+
+        tags = get_or_create_tags(add)
+        if tags:
+            # INSERT ... SELECT item x tag, skipping pairs that already exist
+            qn = connection.ops.quote_name
+            sub_sql, sub_params = item_ids.query.sql_with_params()
+            tag_ids = [tag.id for tag in tags.values()]
+            sql = (
+                f"INSERT INTO {qn(Through._meta.db_table)} "
+                f"({qn(Through._meta.get_field('item').column)}, {qn(Through._meta.get_field('tag').column)}) "
+                f"SELECT sub.id, tag.id FROM ({sub_sql}) sub CROSS JOIN {qn(Tag._meta.db_table)} tag "
+                f"WHERE tag.id IN ({', '.join(['%s'] * len(tag_ids))}) "
+                f"ON CONFLICT DO NOTHING"
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [*sub_params, *tag_ids])
+                added = cursor.rowcount
+
+        if remove:
+            removed, _ = Through.objects.filter(item_id__in=item_ids, tag__name__in=remove).delete()
+
+        return {"matched": matched_count, "added": added, "removed": removed}
+
+def purge_orphan_tags():
+    """
+    Deletes tags that are no longer attached to any Item, including ones
+    created on purpose and not used yet. Maintenance only (staff action
+    /api/tags/purge-orphans/), never run as a side effect.
+    """
+    Through = Item.tags.through
+    deleted, _ = Tag.objects.filter(~Exists(Through.objects.filter(tag_id=OuterRef("pk")))).delete()
+    return deleted
+
+def merge_tags(source, target):
+    """
+    Moves every Item tagged `source` onto `target`, then deletes `source`.
+    Set-based: one UPDATE that skips items already
+    tagged `target`, plus one DELETE of the leftover duplicate rows.
+    """
+    if source.pk == target.pk:
+        return {"moved": 0, "duplicates": 0}
+
+    Through = Item.tags.through
+    with transaction.atomic():
+        # Through-table writes fire no m2m_changed
+        affected = Item.objects.filter(tags=source)
+        touch_items(affected)
+        invalidate_item_cards(affected)
+
+        moved = (
+            Through.objects
+            .filter(tag_id=source.pk)
+            .exclude(Exists(Through.objects.filter(item_id=OuterRef("item_id"), tag_id=target.pk)))
+            .update(tag_id=target.pk)
+        )
+        duplicates, _ = Through.objects.filter(tag_id=source.pk).delete()
+        source.delete()
+
+    return {"moved": moved, "duplicates": duplicates}
+
+def rename_tag(tag, name):
+    """
+    Renames a tag. If another tag already has that name, the two are merged.
+    Returns the resulting tag and the merge counts (None when not merged).
+    The target row is locked, and a name taken by a concurrent create while
+    renaming falls back to a merge instead of an IntegrityError.
+    """
+    with transaction.atomic():
+        existing = Tag.objects.select_for_update().filter(name=name).exclude(pk=tag.pk).first()
+        if existing:
+            return existing, merge_tags(tag, existing)
+        if tag.name == name:
+            return tag, None
 
-    # Get or create and append
-    for tag_name in src_auto_tag_names:
-        tag_obj, _ = Tag.objects.get_or_create(name=tag_name)
-        new_tags_list.append(tag_obj)
+        try:
+            with transaction.atomic():
+                Tag.objects.filter(pk=tag.pk).update(name=name)
+        except IntegrityError:
+            existing = Tag.objects.select_for_update().get(name=name)
+            return existing, merge_tags(tag, existing)
 
-    item.tags.set(new_tags_list)
+    tag.name = name
+    return tag, None